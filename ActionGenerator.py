@@ -1,25 +1,79 @@
-from collections import Counter
-import re
 import os
 import json
 import time
-from typing import Dict, List, Optional, Tuple, Set
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import TileCodec
+import MeldDecomposer
+from TileAccounting import UnseenTiles
+from StateChannel import receive_states
 
 def list_subtract(curr_list: List[str], prev_list: List[str]) -> List[str]:
-    """计算 curr_list 相对于 prev_list 新增的元素（考虑重复元素）"""
-    prev_counter = Counter(prev_list)
-    curr_counter = Counter(curr_list)
-    new_tiles = []
-    for tile, count in curr_counter.items():
-        prev_count = prev_counter.get(tile, 0)
-        if count > prev_count:
-            new_tiles.extend([tile] * (count - prev_count))
-    return new_tiles
+    """计算 curr_list 相对于 prev_list 新增的元素（考虑重复元素，基于计数向量）"""
+    return TileCodec.subtract(curr_list, prev_list)
+
+class ActionHistory:
+    """
+    一局内的动作历史：按顺序保存，并以哈希索引支持常数时间查重
+    - 弃牌：(座位, 牌, 该家第几次打出这张牌)，同一张牌的合法重复打出不会被误判；
+      次数由牌在牌河中的位置推出，同一张牌再次被看到（如牌河识别闪烁）时映射回同一个键；
+      被鸣走的牌会离开牌河，单独记录，使之后打出的同种牌序号不变
+    - 副露：(座位, 类型, 排序后的牌组)
+    """
+    def __init__(self):
+        self.actions = []
+        self.keys = set()
+        self.called = {}              # (座位, 牌) -> 被鸣走（离开牌河）的弃牌序号，按出牌顺序递增
+        self.last_discard_key = None  # 最近一次弃牌的键，被鸣牌时据此记录
+
+    @staticmethod
+    def discard_key(seat: int, tile: str, ordinal: int) -> Tuple:
+        return ("discard", seat, tile, ordinal)
+
+    def discard_ordinal(self, seat: int, tile: str, occurrence: int) -> int:
+        """牌河中第 occurrence 张（从 0 计）这种牌对应的出牌序号：跳过此前被鸣走的同种牌"""
+        ordinal = occurrence
+        for called in self.called.get((seat, tile), ()):
+            if called <= ordinal:
+                ordinal += 1
+        return ordinal
+
+    def mark_called(self) -> None:
+        """最近一次弃牌被鸣走，离开牌河"""
+        if self.last_discard_key is not None:
+            _, seat, tile, ordinal = self.last_discard_key
+            self.called.setdefault((seat, tile), []).append(ordinal)
+            self.last_discard_key = None
+
+    @staticmethod
+    def meld_key(seat: int, op_type: int, combination: List[str]) -> Tuple:
+        return ("meld", seat, op_type, tuple(sorted(combination)))
+
+    def __contains__(self, key: Tuple) -> bool:
+        return key in self.keys
+
+    def __iter__(self):
+        return iter(self.actions)
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def add(self, action: Dict, key: Tuple) -> None:
+        self.actions.append(action)
+        self.keys.add(key)
+        if key[0] == "discard":
+            self.last_discard_key = key
+
+    def clear(self) -> None:
+        self.actions.clear()
+        self.keys.clear()
+        self.called.clear()
+        self.last_discard_key = None
 
 class MahjongActionDetector:
     def __init__(self):
         self.prev_state = None
-        self.tile_pattern = re.compile(r"^(?:([0-9])([mps])|([1-7])(z))$")
         self.wind_map = {"1z": "东", "2z": "南", "3z": "西", "4z": "北"}
         self.last_discard_seat = None
         self.last_discard_tile = None
@@ -29,15 +83,17 @@ class MahjongActionDetector:
         self.field_wind = None
         self.self_wind = None
         self.action_history = []
-        # 存储每个玩家的明牌集合，用于更好地追踪历史
-        self.player_melds = {0: [], 1: [], 2: [], 3: []}
+        # 每个玩家当前明牌区的面子划分（MeldDecomposer.Partition），用于更好地追踪历史
+        self.player_melds = {0: (), 1: (), 2: (), 3: ()}
+        self.concealed_kans = {0: [], 1: [], 2: [], 3: []}  # 暗杠牌种（只可见两张，不参与划分）
         self.current_turn = 0
-        self.last_actions = []  # 存储所有历史动作
+        self.last_actions = ActionHistory()  # 一局内的历史动作（带查重索引）
         self.seat_list = []
         self.turn_order = [] # 座位顺序, 0-3,自己为0
         self.waiting_for_discard = False
         self.next_expected_turn = None
         self.last_meld_check = {}  # 用于跟踪上次检查的明牌状态
+        self.unseen = UnseenTiles()  # 未见牌计数，随动作增量更新，供下游查询剩余张数与摸牌概率
     
     def clearAll(self):
         """清理状态"""
@@ -48,26 +104,17 @@ class MahjongActionDetector:
         self.field_wind = None
         self.self_wind = None
         self.action_history = []
-        # 存储每个玩家的明牌集合，用于更好地追踪历史
-        self.player_melds = {0: [], 1: [], 2: [], 3: []}
+        # 每个玩家当前明牌区的面子划分（MeldDecomposer.Partition），用于更好地追踪历史
+        self.player_melds = {0: (), 1: (), 2: (), 3: ()}
+        self.concealed_kans = {0: [], 1: [], 2: [], 3: []}  # 暗杠牌种（只可见两张，不参与划分）
         self.current_turn = 0
-        self.last_actions = []  # 存储所有历史动作
+        self.last_actions.clear()
         self.seat_list = []
         self.turn_order = [] # 座位顺序, 0-3,自己为0
         self.waiting_for_discard = False
         self.next_expected_turn = None
         self.last_meld_check = {}  # 用于跟踪上次检查的明牌状态
 
-    def parse_tile(self, tile: str) -> Dict:
-        """解析牌的类型和数字"""
-        match = self.tile_pattern.match(tile)
-        if not match:
-            raise ValueError(f"Invalid tile: {tile}")
-        if match.group(3):
-            return {"num": int(match.group(3)), "type": "z"}
-        else:
-            return {"num": int(match.group(1)), "type": match.group(2)}
-        
     def get_seat_by_position(self, position: str) -> int:
         """根据位置获取座位号"""
         return {"Self_Mingpai":0, "Second_Mingpai":1, "Third_Mingpai":2, "Fourth_Mingpai":3}.get(position, -1)
@@ -84,7 +131,8 @@ class MahjongActionDetector:
         if not state1 or not state2:
             return False
         for key in set(state1.get("tiles", {}).keys()) | set(state2.get("tiles", {}).keys()):
-            if Counter(state1.get("tiles", {}).get(key, [])) != Counter(state2.get("tiles", {}).get(key, [])):
+            if not np.array_equal(TileCodec.counts(state1.get("tiles", {}).get(key, [])),
+                                  TileCodec.counts(state2.get("tiles", {}).get(key, []))):
                 return False
         return True
     
@@ -104,14 +152,6 @@ class MahjongActionDetector:
             self.turn_order = [0, 1, 2, 3]
             self.current_turn = 0
 
-    def find_new_melds(self, prev_melds: List[List[str]], curr_melds: List[List[str]]) -> List[List[str]]:
-        """找出新增的面子"""
-        new_melds = []
-        for curr_meld in curr_melds:
-            if not any(Counter(prev_meld)==Counter(curr_meld) for prev_meld in prev_melds):
-                new_melds.append(curr_meld)
-        return new_melds
-    
     def detect_added_kan(self, prev_tiles: List[str], curr_tiles: List[str]) -> Optional[List[str]]:
         """检测是否是在已有三张牌上加杠"""
         # 检查新增了哪些牌
@@ -120,17 +160,17 @@ class MahjongActionDetector:
         if len(new_tiles) != 1:
             return None
             
-        # 检查新增的牌是否能与之前的牌组成4张相同的牌
-        added_tile = new_tiles[0]
-        count = Counter(curr_tiles)[added_tile]
-        if count == 4:
-            return [added_tile] * 4
+        # 检查新增的牌是否能与之前的牌组成4张相同的牌（红五与普通五同种）
+        added_kind = TileCodec.kind(new_tiles[0])
+        curr_counts = TileCodec.counts(curr_tiles)
+        if TileCodec.fold(curr_counts)[added_kind] == 4:
+            return TileCodec.take(curr_counts, added_kind, 4)
             
         # 之前可能已经有3个相同的牌
         prev_triplets = self.identify_triplets(prev_tiles)
         for triplet in prev_triplets:
-            if triplet[0] == added_tile:
-                return [added_tile] * 4
+            if TileCodec.kind(triplet[0]) == added_kind:
+                return triplet + new_tiles
             
         return None
     
@@ -141,106 +181,35 @@ class MahjongActionDetector:
             return False
             
         # 检查这两张牌是否相同
-        if new_tiles[0] != new_tiles[1]:
+        kan_kind = TileCodec.kind(new_tiles[0])
+        if TileCodec.kind(new_tiles[1]) != kan_kind:
             return False
             
         # 查看之前是否已经有这种牌，如果有可能是加杠而不是暗杠
-        for tile in visible_tiles:
-            if tile == new_tiles[0]:
-                return False
-                
-        return True
+        return TileCodec.kind_counts(visible_tiles)[kan_kind] == 0
         
     def identify_triplets(self, tiles: List[str]) -> List[List[str]]:
         """只识别刻子（三张相同的牌）"""
         if not tiles:
             return []
-            
-        triplets = []
-        counter = Counter(tiles)
-        for tile, count in counter.items():
-            if count >= 3:
-                triplets.append([tile] * 3)
-        return triplets
-
-    def identify_straights(self, tiles: List[str], exclude_tiles: Set[str]) -> List[List[str]]:
-        """识别顺子，排除已经用于刻子的牌"""
-        if not tiles:
-            return []
-            
-        straights = []
-        # 按花色分组
-        by_type = {}
-        for tile in tiles:
-            if tile in exclude_tiles:
-                continue
-            t = self.parse_tile(tile)
-            if t["type"] in ['m', 'p', 's']:  # 只有万、筒、条可以组成顺子
-                key = t["type"]
-                by_type.setdefault(key, []).append(tile)
-        
-        # 检查每种花色中可能的顺子
-        for suit, suit_tiles in by_type.items():
-            # 统计每个数字的牌的数量
-            num_counts = {}
-            for tile in suit_tiles:
-                num = int(tile[0])
-                num_counts[num] = num_counts.get(num, 0) + 1
-            
-            # 寻找连续的三个数字
-            for i in range(1, 8):  # 数字1-7才可能是顺子的开始
-                if num_counts.get(i, 0) > 0 and num_counts.get(i+1, 0) > 0 and num_counts.get(i+2, 0) > 0:
-                    straight = [f"{i}{suit}", f"{i+1}{suit}", f"{i+2}{suit}"]
-                    straights.append(straight)
-                    # 减少计数，避免同一张牌被多次使用
-                    num_counts[i] -= 1
-                    num_counts[i+1] -= 1
-                    num_counts[i+2] -= 1
-        
-        return straights
+        counts = TileCodec.counts(tiles)
+        return [TileCodec.take(counts, k, 3) for k in np.flatnonzero(TileCodec.fold(counts) >= 3).tolist()]
 
-    def identify_melds(self, tiles: List[str]) -> List[List[str]]:
-        """更准确地识别面子，优先考虑刻子和杠"""
-        if not tiles:
-            return []
-        
-        melds = []
-        # 先识别所有可能的刻子
-        counter = Counter(tiles)
-        kans = []  # 杠
-        triplets = []  # 刻子
-        
-        # 先检查杠（4张相同的牌）
-        for tile, count in counter.items():
-            if count >= 4:
-                kans.append([tile] * 4)
-                counter[tile] -= 4  # 减少计数
-        
-        # 然后检查刻子（3张相同的牌）
-        for tile, count in counter.items():
-            if count >= 3:
-                triplets.append([tile] * 3)
-                counter[tile] -= 3  # 减少计数
-        
-        # 添加杠和刻子到结果
-        melds.extend(kans)
-        melds.extend(triplets)
-        
-        # 计算已使用的牌
-        used_tiles = set()
-        for meld in melds:
-            for i, tile in enumerate(meld):
-                # 只标记实际数量的牌为已使用
-                if counter[tile] > 0:
-                    used_tiles.add(tile)
-                    counter[tile] -= 1
-        
-        # 最后检查顺子，排除已用于刻子和杠的牌
-        remaining_tiles = [t for t in tiles if t not in used_tiles or counter[t] > 0]
-        straights = self.identify_straights(remaining_tiles, used_tiles)
-        melds.extend(straights)
-        
-        return melds
+    def meld_counts(self, seat: int, tiles: List[str]) -> np.ndarray:
+        """明牌区参与面子划分的 34 计数向量（扣除暗杠可见的两张）"""
+        counts = TileCodec.kind_counts(tiles)
+        for kan_kind in self.concealed_kans[seat]:
+            counts[kan_kind] = max(counts[kan_kind] - 2, 0)
+        return counts
+
+    def choose_melds(self, seat: int, tiles: List[str]) -> Optional[MeldDecomposer.Partition]:
+        """
+        穷举明牌区的全部面子划分（按计数向量记忆化），选出与上一帧划分一致、
+        且新增面子包含最后一张弃牌的划分；无法完整划分（多为识别错误）时返回 None
+        """
+        partitions = MeldDecomposer.decompose(self.meld_counts(seat, tiles))
+        called_kind = TileCodec.kind(self.last_discard_tile) if TileCodec.is_tile(self.last_discard_tile or "") else None
+        return MeldDecomposer.choose_partition(partitions, self.player_melds[seat], called_kind)
 
     def detect_melds(self, prev_state: Dict, curr_state: Dict) -> List[Dict]:
         """检测明牌和杠"""
@@ -278,6 +247,8 @@ class MahjongActionDetector:
                     }
                 }
                 actions.append(action)
+                self.last_actions.add(action, ActionHistory.meld_key(seat, 5, added_kan))
+                self.player_melds[seat] = self.choose_melds(seat, curr_tiles) or self.player_melds[seat]
                 self.current_turn = seat
                 self.next_expected_turn = (seat + 1) % 4
                 continue
@@ -295,56 +266,50 @@ class MahjongActionDetector:
                     }
                 }
                 actions.append(action)
+                self.last_actions.add(action, ActionHistory.meld_key(seat, 4, action["operation"]["combination"]))
+                self.concealed_kans[seat].append(TileCodec.kind(new_tiles[0]))
                 self.current_turn = seat
                 self.next_expected_turn = (seat + 1) % 4
                 continue
             
             # 其他面子检测（刻子、顺子）
             if len(new_tiles) >= 3:  # 至少需要3张牌才能形成面子
-                # 使用改进后的面子识别方法
-                prev_melds = self.identify_melds(prev_tiles)
-                curr_melds = self.identify_melds(curr_tiles)
-                new_melds = self.find_new_melds(prev_melds, curr_melds)
+                # 穷举面子划分，取与上一帧一致的一种，只对新增面子生成动作
+                partition = self.choose_melds(seat, curr_tiles)
+                if partition is None:
+                    print(f"{position}无法划分为完整面子，跳过")
+                    continue
+                added = MeldDecomposer.new_melds(partition, self.player_melds[seat])
+                # 新增面子优先使用本帧新增的牌（红五归属更准确）
+                new_melds = MeldDecomposer.meld_tiles(added, TileCodec.counts(curr_tiles), TileCodec.counts(new_tiles))
                 
-                for meld in new_melds:
-                    action_type = None
-                    if len(meld) == 3:
-                        if len(set(meld)) == 1:
-                            action_type = 3  # 碰
-                        else:
-                            action_type = 2  # 吃
-                    elif len(meld) == 4:
-                        action_type = 5  # 明杠
-                    if action_type:
-                        action = {
-                            "state": "MyAction_Chipongang" if seat == 0 else "Other_Chipongang",
-                            "seat": seat,
-                            "tile": self.last_discard_tile if action_type in [2,3,5] else meld[0],
-                            "doras": curr_state.get("doras", []),
-                            "operation": {
-                                "type": action_type,
-                                "combination": meld
-                            }
+                # 面子类型由划分给出（吃=2、碰=3、明杠=5），红五不影响判断
+                for action_type, meld in zip((m.type for m in added), new_melds):
+                    action = {
+                        "state": "MyAction_Chipongang" if seat == 0 else "Other_Chipongang",
+                        "seat": seat,
+                        "tile": self.last_discard_tile if action_type in [2,3,5] else meld[0],
+                        "doras": curr_state.get("doras", []),
+                        "operation": {
+                            "type": action_type,
+                            "combination": meld
                         }
-                        
-                        # 避免重复检测，a为当前动作，b为历史动作
-                        is_duplicate = any( 
-                            Counter(meld) == Counter(a.get("operation", {}).get("combination", []))
-                            and a.get("seat") == seat 
-                            and a.get("operation", {}).get("type") == action_type
-                            for a in self.last_actions
-                        )
-                        
-                        if not is_duplicate:
-                            actions.append(action)
-                            if action_type in [2,3,5]:
-                                self.current_turn = seat
-                                self.next_expected_turn = (seat + 1) % 4
-                            else:
-                                self.next_expected_turn = (self.current_turn + 1) % 4
-                        
+                    }
+                    
+                    # 避免重复检测（按座位、类型与牌组索引）
+                    key = ActionHistory.meld_key(seat, action_type, meld)
+                    if key not in self.last_actions:
+                        actions.append(action)
+                        self.last_actions.add(action, key)
+                        if action_type in [2,3,5]:
+                            self.last_actions.mark_called()  # 被鸣的弃牌离开牌河
+                            self.current_turn = seat
+                            self.next_expected_turn = (seat + 1) % 4
+                        else:
+                            self.next_expected_turn = (self.current_turn + 1) % 4
+                    
                 # 更新该玩家的面子记录
-                self.player_melds[seat] = curr_melds
+                self.player_melds[seat] = partition
                 
         return actions
 
@@ -365,9 +330,20 @@ class MahjongActionDetector:
             return actions
         prev_discards = prev_state.get("tiles", {}).get(current_player_pos, [])
         curr_discards = curr_state.get("tiles", {}).get(current_player_pos, [])
-        new_discards = list_subtract(curr_discards, prev_discards)
+        # 牌河按出牌顺序追加：上一帧是当前帧的前缀时直接取尾部，否则按多重集合求差
+        if curr_discards[:len(prev_discards)] == prev_discards:
+            new_discards = curr_discards[len(prev_discards):]
+        else:
+            new_discards = list_subtract(curr_discards, prev_discards)
         print(f"弃牌检查新增牌: {new_discards}")
+        pond_seat = self.current_turn
+        # 新增的牌是牌河中该种牌的最后几张，由其在牌河中的位置得到出牌序号
+        totals, pending = TileCodec.counts(curr_discards), TileCodec.counts(new_discards)
         for tile in new_discards:
+            index = TileCodec.encode(tile)
+            occurrence = int(totals[index] - pending[index])
+            pending[index] -= 1
+            key = ActionHistory.discard_key(pond_seat, tile, self.last_actions.discard_ordinal(pond_seat, tile, occurrence))
             if self.current_turn == 0:
                 prev_hand = prev_state.get("tiles", {}).get("Hand_Tiles", [])
                 curr_hand = curr_state.get("tiles", {}).get("Hand_Tiles", [])
@@ -384,19 +360,22 @@ class MahjongActionDetector:
                     "seat": self.current_turn,
                     "tile": tile,
                 }
-            is_duplicate = any(
-                a.get("tile") == tile 
-                and a.get("seat", -1) == (self.current_turn if self.current_turn !=0 else -1)
-                for a in self.last_actions
-            )
-            if not is_duplicate:
+            if key not in self.last_actions:
                 actions.append(action)
+                self.last_actions.add(action, key)
                 self.last_discard_seat = self.current_turn
                 self.last_discard_tile = tile
                 self.current_turn = (self.current_turn + 1) % 4
                 self.next_expected_turn = None
         return actions
 
+    def account(self, actions: List[Dict]) -> List[Dict]:
+        """按动作顺序更新未见牌计数，并在每个动作上附带该动作之后的未见牌快照（剩余张数与摸牌概率）"""
+        for action in actions:
+            self.unseen.update(action)
+            action["unseen"] = self.unseen.snapshot()
+        return actions
+
     def process(self, curr_state: Dict) -> List[Dict]:
         try:
             if self.Is_states_equal(self.prev_state, curr_state):
@@ -407,20 +386,20 @@ class MahjongActionDetector:
                     print("游戏开始")
                     self.detect_seat_order(curr_state)
                     self.prev_state = curr_state.copy()
-                    self.last_actions = []
-                    return [{
+                    self.last_actions.clear()
+                    return self.account([{
                         "state": "GameStart",
                         "seatList": curr_state.get("seatList", []),
                         "chang": int(curr_state.get("FieldWind", "1z")[0]),
                         "tiles": curr_state.get("tiles", {}).get("Hand_Tiles", []),
                         "doras": curr_state.get("doras", [])
-                    }]
+                    }])
                 self.prev_state = curr_state.copy()
                 return []
             if curr_state.get("state") == "GameEnd":
                 self.clearAll()
                 self.prev_state = curr_state.copy()
-                return [{"state": "GameEnd"}]
+                return self.account([{"state": "GameEnd"}])
             print("旧状态", self.prev_state)
             print("新状态", curr_state)
             actions = []
@@ -429,24 +408,97 @@ class MahjongActionDetector:
             discard_actions = self.detect_discards(self.prev_state, curr_state)
             actions.extend(discard_actions)
             self.prev_state = curr_state.copy()
-            self.last_actions.extend(actions.copy())
-            return actions
+            return self.account(actions)
         except Exception as e:
             import traceback
             print(f"Error processing state: {e}")
             print(traceback.format_exc())
             return []
 
-def monitor_json(filename:str, detector, action_file):
+class ActionLog:
+    """动作文件批量写入：累计到一定条数时写入，其余由后台线程按间隔一次性追加"""
+    def __init__(self, path:str, flush_count:int=8, flush_interval:float=0.5):
+        self.path = path
+        self.flush_count = flush_count
+        self.buffer = []
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        threading.Thread(target=self._flush_loop, args=(flush_interval,), daemon=True).start()
+
+    def write(self, actions:List[Dict])-> None:
+        with self.lock:
+            self.buffer.extend(json.dumps(action, ensure_ascii=False) for action in actions)
+            due = len(self.buffer) >= self.flush_count
+        if due:
+            self.flush()
+
+    def flush(self)-> None:
+        with self.lock:
+            lines, self.buffer = self.buffer, []
+            if lines:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write("\n".join(lines) + "\n")
+
+    def close(self)-> None:
+        self._stop.set()
+        self.flush()
+
+    def _flush_loop(self, interval:float)-> None:
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"⚠️ 写入动作文件失败: {e}")
+
+def print_action(action:Dict)-> None:
+    """打印检测到的动作"""
+    action_type = action.get("state")
+    seat = action.get("seat", 0)
+    tile = action.get("tile", "")
+    op_type = action.get("operation", {}).get("type", 0)
+    op_name = {1:"弃牌",2:"吃",3:"碰",4:"暗杠",5:"明杠"}.get(op_type, "")
+    if action_type == "MyAction":
+        print(f"检测到动作: {action_type} - 自己打出 {tile} 摸到 {action.get('getTile', '')}")
+    elif action_type == "Discard":
+        print(f"检测到动作: {action_type} - 玩家{seat}打出 {tile}")
+    elif "Chipongang" in action_type:
+        print(f"检测到动作: {action_type} - 玩家{seat}{op_name} {tile}")
+
+def handle_state(detector:MahjongActionDetector, action_log:ActionLog, state:Dict)-> List[Dict]:
+    """处理一帧牌局状态：检测动作、写入动作文件并打印"""
+    actions = detector.process(state)
+    if actions:
+        action_log.write(actions)
+        for action in actions:
+            print_action(action)
+    # 对局结束时立即落盘
+    if state.get("state") == "GameEnd":
+        action_log.flush()
+    return actions
+
+def attach_detector(channel, detector:MahjongActionDetector, action_log:ActionLog)-> None:
+    """在识别进程内订阅牌局状态通道（无需轮询文件）"""
+    channel.subscribe(lambda state: handle_state(detector, action_log, state))
+
+def monitor_channel(name:str, authkey:bytes, detector:MahjongActionDetector, action_log:ActionLog)-> None:
+    """独立进程运行：通过命名管道 / Unix 套接字接收识别进程发布的牌局状态"""
+    print("开始接收牌局状态...")
+    for state in receive_states(name, authkey):
+        try:
+            handle_state(detector, action_log, state)
+        except Exception as e:
+            import traceback
+            print(f"处理错误: {e}")
+            print(traceback.format_exc())
+
+def monitor_json(filename:str, detector, action_log:ActionLog):
+    """兼容旧流程：轮询 BoardState.json 的修改时间"""
     if not os.path.exists(filename):
         print(f"文件 {filename} 不存在。")
         return
     last_mtime = 0
     try:
         last_mtime = os.path.getmtime(filename)
-        with open(filename, 'r', encoding='utf-8') as f:
-            json_data = f.read().strip()
-            prev_data = json.loads(json_data) if json_data else {}
     except Exception as e:
         print(f"初始读取失败: {e}")
         return
@@ -463,21 +515,7 @@ def monitor_json(filename:str, detector, action_file):
                 if not json_data:
                     continue
                 curr_data = json.loads(json_data)
-            actions = detector.process(curr_data)
-            for action in actions:
-                with open(action_file, 'a', encoding='utf-8') as f:
-                    f.write(f"{json.dumps(action, ensure_ascii=False)}\n")
-                action_type = action.get("state")
-                seat = action.get("seat", 0)
-                tile = action.get("tile", "")
-                op_type = action.get("operation", {}).get("type", 0)
-                op_name = {1:"弃牌",2:"吃",3:"碰",4:"暗杠",5:"明杠"}.get(op_type, "")
-                if action_type == "MyAction":
-                    print(f"检测到动作: {action_type} - 自己打出 {tile} 摸到 {action.get('getTile', '')}")
-                elif action_type == "Discard":
-                    print(f"检测到动作: {action_type} - 玩家{seat}打出 {tile}")
-                elif "Chipongang" in action_type:
-                    print(f"检测到动作: {action_type} - 玩家{seat}{op_name} {tile}")
+            handle_state(detector, action_log, curr_data)
         except Exception as e:
             import traceback
             print(f"处理错误: {e}")
@@ -485,13 +523,17 @@ def monitor_json(filename:str, detector, action_file):
 
 if __name__ == '__main__':
     try:
-        with open("Data/json/profile.json", "r", encoding="utf-8") as f:
-            profile = json.load(f)
+        from Config import profile
+        channel_cfg = profile["BoardChannel"]
         with open(profile["PATH"]["ActionPath"], "w", encoding="utf-8") as f:
             pass
         detector = MahjongActionDetector()
-        monitor_json(profile["PATH"]["BoardStatePath"], detector, profile["PATH"]["ActionPath"])
-        # monitor_json(profile["PATH"]["BoardStatePath"], detector, "E:\Programs\Code_VSCode\MahjongCopilot\game_log\pre.txt")
+        action_log = ActionLog(profile["PATH"]["ActionPath"], channel_cfg["ActionFlushCount"], channel_cfg["ActionFlushInterval"])
+        if channel_cfg["Mode"] == "file":
+            monitor_json(profile["PATH"]["BoardStatePath"], detector, action_log)
+        else:
+            # 识别进程需以 Mode=pipe 启动状态通道
+            monitor_channel(channel_cfg["PipeName"], channel_cfg["AuthKey"].encode(), detector, action_log)
     except Exception as e:
         print(f"启动错误: {e}")
-        input("按任意键退出...")
\ No newline at end of file
+        input("按任意键退出...")
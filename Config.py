@@ -0,0 +1,123 @@
+import os
+import json
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Mapping, Optional
+
+PROFILE_PATH = "Data/json/profile.json"
+
+# 像素矩形 (x1, y1, x2, y2)
+PixelRect = tuple[int, int, int, int]
+
+def freeze(value:Any)-> Any:
+    """递归转换为只读结构：dict -> MappingProxyType，list -> tuple"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+def load_profile(path:str=PROFILE_PATH)-> Mapping[str, Any]:
+    """读取并冻结配置文件"""
+    with open(path, "r", encoding="utf-8") as f:
+        return freeze(json.load(f))
+
+class Config(Mapping):
+    """
+    进程内共享的只读配置：运行期不可修改，各模块读取到的是同一份快照；
+    配置文件修改后整体替换为新快照（热重载），并通知订阅者
+    """
+    def __init__(self, path:str=PROFILE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = load_profile(path)
+        self._mtime = self._file_mtime()
+        self._version = 0
+        self._rect_cache = {}   # (版本, 区域配置名, w, h) -> {区域名: 像素矩形}
+        self._listeners = []
+        self._watch_thread = None
+        self._stop_watch = threading.Event()
+
+    def __getitem__(self, key:str)-> Any:
+        return self._data[key]
+
+    def __iter__(self)-> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self)-> int:
+        return len(self._data)
+
+    @property
+    def version(self)-> int:
+        """每次热重载加一，可用于判断缓存是否过期"""
+        return self._version
+
+    def pixel_rects(self, name:str, w:int, h:int)-> Mapping[str, PixelRect]:
+        """
+        将区域配置（如 Regions_PC）的比例矩形换算为像素矩形，按分辨率缓存
+        :param name: 区域配置名
+        """
+        with self._lock:
+            version, data = self._version, self._data
+        key = (version, name, w, h)
+        rects = self._rect_cache.get(key)
+        if rects is None:
+            from IMGProcess.DrawPic import pixel_rects
+            rects = MappingProxyType(pixel_rects(data[name], h, w))
+            with self._lock:
+                if version == self._version:
+                    self._rect_cache[key] = rects
+        return rects
+
+    def subscribe(self, callback:Callable[["Config"], None])-> None:
+        """注册热重载回调"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def reload(self, force:bool=False)-> bool:
+        """文件有修改时重新加载，返回是否替换了配置；文件损坏时保留旧配置"""
+        mtime = self._file_mtime()
+        if not force and mtime == self._mtime:
+            return False
+        try:
+            data = load_profile(self.path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 配置重载失败，沿用旧配置: {e}")
+            self._mtime = mtime
+            return False
+        with self._lock:
+            self._data = data
+            self._mtime = mtime
+            self._version += 1
+            self._rect_cache = {}
+            listeners = list(self._listeners)
+        print(f"🔄 配置已重载 (版本 {self._version})")
+        for callback in listeners:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"⚠️ 配置重载回调失败: {e}")
+        return True
+
+    def watch(self, interval:float=2.0)-> threading.Thread:
+        """后台轮询配置文件修改时间，变化时热重载"""
+        if self._watch_thread is None or not self._watch_thread.is_alive():
+            self._stop_watch.clear()
+            def _loop():
+                while not self._stop_watch.wait(interval):
+                    self.reload()
+            self._watch_thread = threading.Thread(target=_loop, daemon=True)
+            self._watch_thread.start()
+        return self._watch_thread
+
+    def stop_watch(self)-> None:
+        self._stop_watch.set()
+
+    def _file_mtime(self)-> Optional[float]:
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+# 共享配置
+profile = Config()
@@ -1,14 +1,14 @@
 import cv2
-import json
 import os
 import threading
 from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from functools import lru_cache
+from IMGProcess.Frame import Frame
+from Metrics import MatchMetrics
 
 # 预处理配置
-with open("Data/json/profile.json", "r", encoding="utf-8") as f:
-    profile = json.load(f)
+from Config import profile
 
 # 使用LRU缓存避免重复读取模板
 @lru_cache(maxsize=32)
@@ -22,32 +22,109 @@ def load_templates_cached(template_folder:str) -> list:
             templates.append((file, template))
     return templates
 
+# 金字塔匹配参数（可热重载，见 profile['StateMatch']）：
+#   PyramidScale   粗匹配缩放比例
+#   RefineMargin   全分辨率精匹配时的搜索余量（像素）
+#   RoiMargin      历史匹配位置的搜索余量（像素）
+#   RoiAcceptScore 历史位置得分达到该值时直接采用，并记录新位置
+#   EarlyExitScore 预期状态得分达到该值时跳过其余状态
+MIN_TEMPLATE_SIZE = 8                             # 缩放后模板过小时直接全分辨率匹配
+OVERRIDE_SCORE = 0.9                              # 结果界面 / 暂停界面得分超过该值时优先于最高分状态
+OVERRIDE_STATES = ("ResultScreen", "Pause")       # 优先处理的状态，提前结束时也必须匹配
+
+# 由上一帧状态推断的匹配顺序（最可能的状态在前）
+STATE_PRIORS = {
+    "MainMenu": ["MainMenu", "Matching", "INGame", "ResultScreen", "Pause"],
+    "Matching": ["Matching", "INGame", "MainMenu", "ResultScreen", "Pause"],
+    "INGame": ["INGame", "ResultScreen", "Pause", "MainMenu", "Matching"],
+    "ResultScreen": ["ResultScreen", "MainMenu", "Matching", "INGame", "Pause"],
+}
+
+def search_window(shape:tuple, x:int, y:int, tw:int, th:int, margin:int)-> tuple[int, int, int, int]:
+    """以 (x, y, tw, th) 为中心扩展 margin 后的搜索窗口，裁剪到图像范围内"""
+    h, w = shape[:2]
+    return max(0, x - margin), max(0, y - margin), min(w, x + tw + margin), min(h, y + th + margin)
+
+def match_in_window(screen:np.ndarray, template:np.ndarray, window:tuple)-> tuple[float, tuple[int, int]]:
+    """在窗口内匹配模板，返回 (得分, 全图坐标)"""
+    x1, y1, x2, y2 = window
+    result = cv2.matchTemplate(screen[y1:y2, x1:x2], template, cv2.TM_CCOEFF_NORMED)
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_val, (max_loc[0] + x1, max_loc[1] + y1)
+
 class GameRunStateDetector:
     def __init__(self):
         # 多线程执行器
         self.executor = ThreadPoolExecutor(max_workers=4)
         
-        # 预加载所有模板结构
-        self.template_cache = {}
-        for state, folder in profile["Templates"].items():
-            self.template_cache[state] = load_templates_cached(folder)
-        
         # 共享状态锁
         self.lock = threading.Lock()
+
+        # 每个模板上一次的匹配位置：(state, file) -> (屏幕尺寸, x, y)
+        self.template_roi = {}
+
+        # 匹配参数与模板（含按缩放比例预缩小的模板），配置热重载时整体替换
+        self._apply_config(profile)
+        profile.subscribe(self._apply_config)
         self.current_screen = None
         self.best_scores = {}
         self.last_state = None
         self.GameStateUseful = profile['GameStateUseful']
+        # 匹配得分只记录在内存中，profile.json 在运行时只读
+        self.metrics = MatchMetrics(profile['MatchMetrics']['SnapshotPath'], profile['MatchMetrics']['SnapshotInterval'])
+
+    def _apply_config(self, config)-> None:
+        """读取匹配参数并预加载所有模板结构（缩小模板依赖缩放比例，一并重建）"""
+        match_config = config['StateMatch']
+        scale = match_config['PyramidScale']
+        template_cache = {}
+        for state, folder in config["Templates"].items():
+            template_cache[state] = [
+                (file, template, cv2.resize(template, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA))
+                for file, template in load_templates_cached(folder)
+            ]
+        with self.lock:
+            self.match_config, self.template_cache = match_config, template_cache
+
+    def _match_template(self, key:tuple, screen_gray:np.ndarray, screen_small:np.ndarray,
+                        template:np.ndarray, small:np.ndarray, cfg)-> float:
+        """由粗到精匹配单个模板：历史位置 → 缩小图粗定位 + 全分辨率局部精匹配"""
+        th, tw = template.shape[:2]
+
+        # 1. 优先在上次匹配到的位置附近搜索
+        roi = self.template_roi.get(key)
+        if roi and roi[0] == screen_gray.shape:
+            score, _ = match_in_window(screen_gray, template, search_window(screen_gray.shape, roi[1], roi[2], tw, th, cfg['RoiMargin']))
+            if score >= cfg['RoiAcceptScore']:
+                return score
+
+        # 2. 缩小图上粗定位，再在全分辨率图上局部精匹配
+        if min(small.shape[:2]) >= MIN_TEMPLATE_SIZE:
+            result = cv2.matchTemplate(screen_small, small, cv2.TM_CCOEFF_NORMED)
+            _, _, _, (sx, sy) = cv2.minMaxLoc(result)
+            scale = cfg['PyramidScale']
+            x, y = int(sx / scale), int(sy / scale)
+            margin = cfg['RefineMargin'] + int(1 / scale)
+            score, loc = match_in_window(screen_gray, template, search_window(screen_gray.shape, x, y, tw, th, margin))
+        else:
+            score, loc = match_in_window(screen_gray, template, (0, 0, screen_gray.shape[1], screen_gray.shape[0]))
+
+        # 记录可信的匹配位置，供下一帧使用
+        if score >= cfg['RoiAcceptScore']:
+            self.template_roi[key] = (screen_gray.shape, loc[0], loc[1])
+        return score
 
-    def _parallel_match(self, state:str, screen_gray:np.ndarray)-> None:
-        """并行匹配单个游戏状态"""
+    def _parallel_match(self, state:str, templates:list, cfg, screen_gray:np.ndarray, screen_small:np.ndarray,
+                        early_exit:bool=False)-> None:
+        """并行匹配单个游戏状态（early_exit 时任一模板得分足够高即停止）"""
         best_score = 0
-        for file, template in self.template_cache[state]:
+        for file, template, small in templates:
             try:
-                result = cv2.matchTemplate(screen_gray, template, cv2.TM_CCOEFF_NORMED)
-                _, max_val, _, _ = cv2.minMaxLoc(result)
+                max_val = self._match_template((state, file), screen_gray, screen_small, template, small, cfg)
                 if max_val > best_score:
                     best_score = max_val
+                if early_exit and best_score >= cfg['EarlyExitScore']:
+                    break
 
             except cv2.error:
                 continue
@@ -55,31 +132,47 @@ class GameRunStateDetector:
         with self.lock:
             self.best_scores[state] = best_score
 
-    def _update_profile(self):
-        """批量更新配置文件"""
-        with self.lock:
-            profile["BestMatchState"].update(self.best_scores)
-            with open("Data/json/profile.json", "w", encoding="utf-8") as f:
-                json.dump(profile, f, ensure_ascii=False, indent=2)
-
-    def get_game_state(self, screen_path:str)-> str:
+    def get_game_state(self, frame:Frame)-> str:
         """优化后的游戏状态检测"""
-        screen_gray = cv2.imread(screen_path, 0)
+        screen_gray = frame.gray if frame.image is not None else None
         if screen_gray is None:
             return "error", "Unknown"  # 确保返回两个值
 
-        futures = []
+        # 本帧使用同一份匹配参数与模板（热重载不会在帧中途生效）
+        with self.lock:
+            cfg, template_cache = self.match_config, self.template_cache
+
+        # 整帧只缩放一次，供所有模板粗匹配
+        scale = cfg['PyramidScale']
+        screen_small = cv2.resize(screen_gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
         self.best_scores.clear()
-        for state in profile["Templates"]:
-            future = self.executor.submit(self._parallel_match, state, screen_gray)
+
+        # 先匹配上一帧预测的状态，得分足够高时直接采用
+        prior = [state for state in STATE_PRIORS.get(self.last_state, []) if state in template_cache]
+        order = prior + [state for state in template_cache if state not in prior]
+        if prior:
+            expected = order[0]
+            self._parallel_match(expected, template_cache[expected], cfg, screen_gray, screen_small, early_exit=True)
+            if self.best_scores[expected] >= cfg['EarlyExitScore']:
+                # 优先状态可能覆盖预期状态，仍需匹配
+                remaining = [state for state in order[1:] if state in OVERRIDE_STATES]
+            else:
+                remaining = order[1:]
+        else:
+            remaining = order
+
+        # 结果不明确时回退到全量匹配
+        futures = []
+        for state in remaining:
+            future = self.executor.submit(self._parallel_match, state, template_cache[state], cfg, screen_gray, screen_small)
             futures.append(future)
 
         for future in futures:
             future.result()
 
-        self._update_profile()
-
         MatchState = max(self.best_scores, key=self.best_scores.get)
+        self.metrics.record(self.best_scores, MatchState)
 
         if self.best_scores.get(MatchState, 0) < 0.6:
             return None
@@ -88,9 +181,9 @@ class GameRunStateDetector:
         GameState = "Unknown"
 
         # 结果界面或暂停界面优先处理
-        if self.best_scores.get("ResultScreen", 0) > 0.9:
+        if self.best_scores.get("ResultScreen", 0) > OVERRIDE_SCORE:
             MatchState = "ResultScreen"
-        elif self.best_scores.get("Pause", 0) > 0.9:
+        elif self.best_scores.get("Pause", 0) > OVERRIDE_SCORE:
             return "GamePause"
         
         # 逻辑状态转换
@@ -121,6 +214,6 @@ class GameRunStateDetector:
 
         self.last_state = MatchState
 
-        print(f"图片路径: {screen_path},当前状态: {MatchState}, 逻辑状态: {GameState}")
+        print(f"帧: {frame.name},当前状态: {MatchState}, 逻辑状态: {GameState}")
 
         return GameState
@@ -2,19 +2,18 @@ import pyautogui
 import time
 import os
 import threading
-from datetime import datetime
 import json
 import pygetwindow as gw
 import sys
 import ctypes
 import queue
-from PIL import Image
 from ImageProcess import ImageDetection,ImageProcessor
 from GameRunStateTest import GameRunStateDetector
+from IMGProcess.Frame import Frame
+from StateChannel import board_channel
 
 # 预加载配置
-with open("Data/json/profile.json", "r", encoding="utf-8") as f:
-    profile = json.load(f)
+from Config import profile
 
 class HighQualityCapturer:
     def __init__(self):
@@ -27,7 +26,8 @@ class HighQualityCapturer:
             'output_dir': profile['PATH']['ScreenShotPath'],
             'max_files': profile['MaxScreenShotCount'],  # 限制最大文件数
             'game_title': profile['GameWindowTitle_CN'],
-            'retry_limit': profile['Retry_Count']
+            'retry_limit': profile['Retry_Count'],
+            'debug_archive': profile.get('DebugArchive', False)  # 调试归档：截图落盘
         }
         
         # 状态控制
@@ -39,10 +39,12 @@ class HighQualityCapturer:
         self.task_queue = queue.Queue(maxsize=profile['MaxQueueCount'])  # 控制内存占用
         
         # 预加载资源
-        os.makedirs(self.cfg['output_dir'], exist_ok=True)
+        if self.cfg['debug_archive']:
+            os.makedirs(self.cfg['output_dir'], exist_ok=True)
         self.detector = GameRunStateDetector()
         self.process_thread = threading.Thread(target=self._process_worker, daemon=True)
         self.ImageProcessor = ImageProcessor()
+        profile.subscribe(self._apply_config)
         
         # 性能计数器
         self.counter = {
@@ -51,6 +53,24 @@ class HighQualityCapturer:
             'last_cleanup': 0
         }
 
+    def _apply_config(self, config)-> None:
+        """配置热重载：截图间隔与清理上限即时生效"""
+        self.cfg['interval'] = config['ScreenShotInterval']
+        self.cfg['max_files'] = config['MaxScreenShotCount']
+
+    def warm_up(self, timer=None)-> threading.Thread:
+        """后台预热模型（等待游戏进程期间完成），返回预热线程"""
+        def _warm():
+            if timer is None:
+                self.ImageProcessor.warm_up()
+                return
+            with timer.measure("模型预热(后台)"):
+                self.ImageProcessor.warm_up()
+            timer.report()
+        thread = threading.Thread(target=_warm, daemon=True)
+        thread.start()
+        return thread
+
     def _init_file_counter(self)-> int:
         """优化文件计数器初始化"""
         try:
@@ -76,7 +96,7 @@ class HighQualityCapturer:
                 print(f"⚠️ 窗口检测异常: {str(e)}")
         return self.window_cache.get('region'), self.window_cache.get('window')
 
-    def _capture_image(self)-> str:
+    def _capture_image(self)-> Frame:
         """高质量截图方法"""
         try:
             region, window = self._get_window_region()
@@ -94,15 +114,9 @@ class HighQualityCapturer:
             # 使用更快的内存映射方式
             img = pyautogui.screenshot(region=region)
             
-            # 生成唯一文件名
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-            filename = f"game_{timestamp}.png"
-            filepath = os.path.join(self.cfg['output_dir'], filename)
-            
-            # 无损保存（压缩级别0）
-            img.save(filepath, format='PNG', compress_level=0)
-            
-            return filepath
+            # 只解码一次，帧在内存中传递；调试归档时由处理线程首次访问 path 时落盘
+            archive_dir = self.cfg['output_dir'] if self.cfg['debug_archive'] else None
+            return Frame.from_pil(img, time.time(), archive_dir)
         
         except Exception as e:
             print(f"📸 截图失败: {str(e)}")
@@ -112,15 +126,19 @@ class HighQualityCapturer:
         """修改后的处理线程"""
         while self.process_running:  # 使用独立控制变量
             try:
-                filepath = self.task_queue.get(timeout=1)
-                GameState = self.detector.get_game_state(filepath)
+                frame = self.task_queue.get(timeout=1)
+                GameState = self.detector.get_game_state(frame)
                 if GameState == "GameStart" or GameState == "GameRunning":
-                    self.detector.GameStateUseful = ImageDetection(filepath, self.ImageProcessor, GameState)
+                    self.detector.GameStateUseful = ImageDetection(frame, self.ImageProcessor, GameState)
                 if GameState == "GameEnd":
                     # 处理游戏结束状态
                     BoardState = {'state':"GameEnd"}
-                    with open("./Data/json/board-state/BoardState.json", 'w', encoding='utf-8') as f:
+                    board_channel.publish(BoardState)
+                    with open(profile['PATH']['BoardStatePath'], 'w', encoding='utf-8') as f:
                         json.dump(BoardState, f, indent=2, ensure_ascii=False)
+                # 调试归档：首次访问 path 时落盘，不占用截图线程
+                if frame.archive_dir:
+                    print(f"🗂️ 截图已归档: {frame.path}")
 
                 self.task_queue.task_done()
             except queue.Empty:
@@ -144,20 +162,21 @@ class HighQualityCapturer:
         next_time = time.time()
         while self.running:
             # 执行捕获
-            filepath = self._capture_image()
-            if filepath:
-                # 增加文件校验逻辑
-                if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
-                    print(f"📸 截图成功: {filepath}")
+            frame = self._capture_image()
+            if frame is not None:
+                # 增加帧校验逻辑
+                if frame.image is not None and frame.image.size > 0:
+                    self.counter['total'] += 1
+                    print(f"📸 截图成功: {frame.name}")
                     try:
-                        self.task_queue.put_nowait((filepath))
+                        self.task_queue.put_nowait(frame)
                     except queue.Full:
                         print("⚠️ 任务队列已满，跳过处理")
                 else:
-                    print(f"❌ 截图文件 {filepath} 未正确生成")
+                    print(f"❌ 截图 {frame.name} 未正确生成")
                 
-                # 定期清理
-                if time.time() - self.counter['last_cleanup'] > 60:
+                # 定期清理（仅调试归档时存在落盘文件）
+                if self.cfg['debug_archive'] and time.time() - self.counter['last_cleanup'] > 60:
                     self._auto_cleanup()
                     self.counter['last_cleanup'] = time.time()
 
@@ -179,7 +198,8 @@ class HighQualityCapturer:
             self.capture_thread = threading.Thread(target=self._precision_capture_loop, daemon=True)
             self.process_thread.start()
             self.capture_thread.start()
-            print(f"🚀 服务已启动 | 路径: {os.path.abspath(self.cfg['output_dir'])} | 间隔: {self.cfg['interval']}s")
+            archive = os.path.abspath(self.cfg['output_dir']) if self.cfg['debug_archive'] else "关闭"
+            print(f"🚀 服务已启动 | 归档: {archive} | 间隔: {self.cfg['interval']}s")
 
     def stop(self)-> None:
         """优化停止方法"""
@@ -1,29 +1,25 @@
 import cv2
 import numpy as np
-from IMGProcess.DrawPic import safe_rect
+from IMGProcess.Geometry import RegionGeometry, ACTOR_HSV_LOWER, ACTOR_HSV_UPPER, ACTOR_KERNEL
 
-def detect_actor(img:np.ndarray, regions:dict)-> tuple[list[bool], dict]:
+def detect_actor(img:np.ndarray, geometry:RegionGeometry, hsv:np.ndarray=None)-> tuple[list[bool], dict]:
     """
     检测黄色高亮区域，判断是否为行动者
+    :param geometry: 当前分辨率的区域几何信息
+    :param hsv:      整帧 HSV 图（Frame.hsv），缺省时在此计算
     """
-    h_img, w_img = img.shape[:2]
-    
+    if hsv is None:
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
     Yellow_Light_Regions = {}
     IsActor = [False, False, False, False]
 
-    # 预计算 HSV 颜色范围
-    lower_bound = np.array([0, 0, 0], dtype=np.uint8)
-    upper_bound = np.array([60, 255, 255], dtype=np.uint8)
-    kernel = np.ones((11, 11), np.uint8)
-
     # 直接遍历 regions，提高访问效率
-    for idx, (key, region) in enumerate(regions.items()):
-        x1, y1, x2, y2 = safe_rect(region["rect"], h_img, w_img)
-        hsv = cv2.cvtColor(img[y1:y2, x1:x2], cv2.COLOR_BGR2HSV)
+    for idx, key in enumerate(geometry.yellow_regions):
+        x1, y1, _, _ = geometry.yellow_rects[key]
 
-        # 计算黄色遮罩
-        mask = cv2.inRange(hsv, lower_bound, upper_bound)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel) 
+        # 计算黄色遮罩（整帧 HSV 的视图）
+        mask = cv2.inRange(geometry.yellow_view(hsv, key), ACTOR_HSV_LOWER, ACTOR_HSV_UPPER)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, ACTOR_KERNEL) 
         
         # 轮廓检测
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -1,27 +1,46 @@
 import os
 import cv2
 import numpy as np
-from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor
-from IMGProcess.Classify import Classify
+from IMGProcess.Prediction import TilePrediction
 
 class BatchClassifier:
-    def __init__(self):
-        self.classifier = Classify()  # 初始化分类器
+    @property
+    def classifier(self):
+        """共享常驻分类器（首次使用时才导入 torch 并加载模型）"""
+        from IMGProcess.Classify import get_classifier
+        return get_classifier()
+
+    def classify_image(self, img:np.ndarray)-> str:
+        """识别内存中的单张牌图像（线程安全）"""
+        try:
+            if img is None or img.size == 0:
+                return "error: 空图像"
+            return self.classifier(img)
+        except Exception as e:
+            return f"error: {str(e)}"
+
+    def classify_batch(self, imgs:list[np.ndarray])-> list[TilePrediction]:
+        """批量识别内存中的牌图像（一次前向推理），返回每张牌的 top-k 识别结果"""
+        results = [TilePrediction("error: 空图像", 0.0, ())] * len(imgs)
+        valid = [i for i, img in enumerate(imgs) if img is not None and img.size > 0]
+        if not valid:
+            return results
+        try:
+            for i, result in zip(valid, self.classifier.classify_batch([imgs[i] for i in valid])):
+                results[i] = result
+        except Exception as e:
+            for i in valid:
+                results[i] = TilePrediction(f"error: {str(e)}", 0.0, ())
+        return results
 
     def process_single_image(self, img_path):
         """处理单张图片（线程安全）"""
         filename = os.path.basename(img_path)
-        try:
-            img = cv2.imread(img_path)
-            if img is None:
-                return filename, "error: 无法读取图像"
-            
-            # 分类识别
-            tile_name = self.classifier(img)
-            return filename, tile_name
-        except Exception as e:
-            return filename, f"error: {str(e)}"
+        img = cv2.imread(img_path)
+        if img is None:
+            return filename, "error: 无法读取图像"
+        return filename, self.classify_image(img)
 
     def process_folder(self, input_folder:str, output_file="results.csv", max_workers=4)-> None:
         """
@@ -38,6 +57,8 @@ class BatchClassifier:
             if f.lower().endswith(image_exts)
         ]
         
+        from tqdm import tqdm  # 仅离线批处理使用进度条
+
         # 创建线程池并处理
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             # 提交所有任务
@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+
+class RegionChangeDetector:
+    """
+    逐区域变化检测：将每个区域缩小为 grid x grid 的灰度缩略图（每格为块均值），
+    与上次重新识别时的缩略图比较，任一格的绝对差超过阈值即视为变化
+    """
+    def __init__(self, grid_size:int=16, threshold:float=20):
+        self.grid_size = grid_size
+        self.threshold = threshold
+        self.references = {}  # 区域名 -> 上次识别时的缩略图
+        self.layout = None    # (h, w, 像素矩形表)，分辨率、设备类型或配置变化时清空参考图
+
+    def reset(self)-> None:
+        """清空参考图，下一帧所有区域都视为变化"""
+        self.references.clear()
+
+    def _thumbnail(self, roi:np.ndarray)-> np.ndarray:
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+        return cv2.resize(gray, (self.grid_size, self.grid_size), interpolation=cv2.INTER_AREA)
+
+    def detect(self, img:np.ndarray, rects:dict, keys)-> set[str]:
+        """
+        返回发生变化的区域名，并将这些区域的参考图更新为当前帧
+        :param rects: 区域名 -> 像素矩形 (x1, y1, x2, y2)
+        """
+        h, w = img.shape[:2]
+        layout = (h, w, id(rects))
+        if layout != self.layout:
+            self.layout = layout
+            self.reset()
+
+        changed = set()
+        for key in keys:
+            x1, y1, x2, y2 = rects[key]
+            if x2 <= x1 or y2 <= y1:
+                changed.add(key)
+                continue
+            thumb = self._thumbnail(img[y1:y2, x1:x2])
+            reference = self.references.get(key)
+            if reference is None or cv2.absdiff(thumb, reference).max() > self.threshold:
+                self.references[key] = thumb
+                changed.add(key)
+        return changed
+
+def perceptual_hash(img:np.ndarray)-> int:
+    """差值哈希（dHash）：9x8 灰度缩略图相邻像素比较，得到 64 位整数"""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+def hamming_distance(a:int, b:int)-> int:
+    return bin(a ^ b).count("1")
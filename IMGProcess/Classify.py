@@ -1,18 +1,18 @@
 import os
 import cv2
-from PIL import Image
 import numpy as np
 import torch
 import torch.nn as nn
-import torch.nn.functional as F
-import torchvision.transforms as transforms
-import json
+import threading
+from typing import Optional
+from IMGProcess.InferenceBackend import create_backend
+from IMGProcess.Prediction import TilePrediction
 
-with open("Data/json/profile.json", "r", encoding="utf-8") as f:
-    profile = json.load(f)
+from Config import profile
 
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 ModelPath = profile['PATH']['ModelPath']
+InferenceConfig = profile['Inference']
 
 # CNN输出(int)与牌名(str)的对应关系
 classes = {
@@ -56,13 +56,23 @@ classes = {
     37: 'back'   # 牌背面
 }
 
-def CV2PIL(img):
-    return Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+INPUT_SIZE = 32
 
-transform = transforms.Compose([
-    transforms.Resize((32, 32)),
-    transforms.ToTensor(),
-    transforms.Normalize((0.5, 0.5, 0.5), (0.5, 0.5, 0.5))])
+def preprocess_batch(imgs: list[np.ndarray]) -> np.ndarray:
+    """
+    批量预处理（OpenCV/NumPy 向量化）：BGR→RGB、缩放到 32x32、归一化到 [-1, 1]
+    :return: NCHW float32 数组
+    """
+    batch = np.empty((len(imgs), INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)
+    for i, img in enumerate(imgs):
+        if img.ndim == 2:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        elif img.shape[2] == 4:
+            img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        batch[i] = cv2.resize(img, (INPUT_SIZE, INPUT_SIZE), interpolation=cv2.INTER_AREA)
+    # 等价于 ToTensor + Normalize((0.5,0.5,0.5), (0.5,0.5,0.5))
+    batch = batch[..., ::-1].transpose(0, 3, 1, 2).astype(np.float32)
+    return np.ascontiguousarray(batch * (2.0 / 255.0) - 1.0)
 
 
 class TileNet(nn.Module):
@@ -76,32 +86,61 @@ class TileNet(nn.Module):
         self.fc3 = nn.Linear(124, 38)
 
     def forward(self, x: torch.Tensor):
-        x = self.pool(F.relu(self.conv1(x)))
-        x = self.pool(F.relu(self.conv2(x)))
+        x = self.pool(torch.relu(self.conv1(x)))
+        x = self.pool(torch.relu(self.conv2(x)))
         x = x.view(-1, 26 * 5 * 5)
-        x = F.relu(self.fc1(x))
-        x = F.relu(self.fc2(x))
+        x = torch.relu(self.fc1(x))
+        x = torch.relu(self.fc2(x))
         x = self.fc3(x)
         return x
 
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """按行计算 softmax"""
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+def load_tile_net(path: str = ModelPath) -> TileNet:
+    """加载 TileNet 权重（eager 模型）"""
+    model = TileNet()
+    # 如果模型是在 GPU 上训练的，但在 CPU 上运行，需要映射到 CPU
+    model.load_state_dict(torch.load(path, map_location=device))
+    return model.eval()
+
 class Classify:
-    def __init__(self):
-        self.model = model = TileNet()
+    def __init__(self, inference_cfg: dict = InferenceConfig):
         path = os.path.join(os.path.dirname('__file__'), ModelPath)
-        # 如果模型是在 GPU 上训练的，但在 CPU 上运行，需要映射到 CPU
-        self.map_location = device
-        self.model.load_state_dict(torch.load(path, map_location=self.map_location))
-        # self.model.load_state_dict(torch.load(path))
-        self.model.to(device)
+        # 推理后端由 profile['Inference'] 选择（torch / torchscript / onnx，可选 int8 量化）
+        self.backend = create_backend(load_tile_net(path), inference_cfg, device, path)
         self.__call__(np.ones((32, 32, 3), dtype=np.uint8))  # load cache
 
     def __call__(self, img: np.ndarray)->str:
         """输入图像，返回牌名"""
-        img = transform(CV2PIL(img))
-        c, n, m = img.shape
-        img = img.view(1, c, n, m).to(device)
-        with torch.no_grad():
-            _, predicted = torch.max(self.model(img), 1)
-            TileID = predicted[0]
-            TileName = classes[TileID.item()]
-        return TileName
\ No newline at end of file
+        return self.classify_batch([img])[0][0]
+
+    def classify_batch(self, imgs: list[np.ndarray], top_k: Optional[int] = None) -> list[TilePrediction]:
+        """输入一帧中的全部牌图像，一次前向推理，返回每张牌的 top-k 识别结果（缺省读取 profile，支持热重载）"""
+        if not imgs:
+            return []
+        if top_k is None:
+            top_k = profile['Classify']['TopK']
+        probs = softmax(self.backend(preprocess_batch(imgs)))
+        top_k = min(top_k, probs.shape[1])
+        top_ids = np.argsort(-probs, axis=1)[:, :top_k]
+        top_probs = np.take_along_axis(probs, top_ids, axis=1)
+        predictions = []
+        for ids, ps in zip(top_ids.tolist(), top_probs.tolist()):
+            candidates = tuple((classes[i], p) for i, p in zip(ids, ps))
+            predictions.append(TilePrediction(candidates[0][0], candidates[0][1], candidates))
+        return predictions
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_classifier() -> Classify:
+    """进程级单例分类器：模型加载与预热只执行一次（后台预热与处理线程可并发调用）"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = Classify()
+    return _classifier
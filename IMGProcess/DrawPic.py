@@ -44,4 +44,8 @@ def resize_for_display(image:np.ndarray, max_width=1000, max_height=800):
     scale = min(max_width / w, max_height / h)  # 计算缩放比例
     if scale < 1:  # 仅当图片过大时缩小
         image = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
-    return image  
\ No newline at end of file
+    return image  
+
+def pixel_rects(regions:dict, h:int, w:int)-> dict:
+    """将区域配置中的比例矩形批量换算为像素矩形 {区域名: (x1, y1, x2, y2)}"""
+    return {key: safe_rect(region['rect'], h, w) for key, region in regions.items()}
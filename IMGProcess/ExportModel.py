@@ -0,0 +1,24 @@
+import argparse
+from IMGProcess.Classify import load_tile_net, InferenceConfig
+from IMGProcess.InferenceBackend import export_torchscript, export_onnx, quantize_model, quantized_path
+
+def export(fmt:str, quantize:bool)-> list[str]:
+    """导出 TileNet 为 TorchScript / ONNX，路径取自 profile['Inference']"""
+    model = load_tile_net()
+    outputs = []
+    if fmt in ("torchscript", "all"):
+        path = InferenceConfig["TorchScriptPath"]
+        if quantize:
+            outputs.append(export_torchscript(quantize_model(load_tile_net()), quantized_path(path)))
+        outputs.append(export_torchscript(model, path))
+    if fmt in ("onnx", "all"):
+        outputs.append(export_onnx(model, InferenceConfig["OnnxPath"], quantize))
+    return outputs
+
+if __name__ == '__main__':
+    # 用法（在项目根目录执行）: python -m IMGProcess.ExportModel --format all --quantize
+    parser = argparse.ArgumentParser(description="导出 TileNet 推理模型")
+    parser.add_argument("--format", choices=["torchscript", "onnx", "all"], default="all")
+    parser.add_argument("--quantize", action="store_true", help="同时导出 int8 动态量化模型")
+    args = parser.parse_args()
+    export(args.format, args.quantize)
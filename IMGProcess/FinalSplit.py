@@ -3,53 +3,165 @@ import cv2
 import numpy as np
 import concurrent.futures
 from functools import partial
+from typing import Optional
 cv2.setNumThreads(4)
 
-def get_mahjongs_contours(img:np.ndarray, img_name:str)-> list[np.ndarray]:
+# 牌面灰度带 [190,210] [210,230] [230,250]：三个通道落在同一灰度带内的像素视为牌面
+GRAY_BANDS = (190, 210, 230)
+BAND_WIDTH = 20
+# 最小通道值 -> 最大通道值上限+1（取下限不超过最小通道值的最高灰度带），不在任何灰度带内为 0
+BAND_LIMIT_LUT = np.zeros(256, np.uint8)
+for _lo in GRAY_BANDS:
+    BAND_LIMIT_LUT[_lo:] = _lo + BAND_WIDTH + 1
+
+MIN_TILE_AREA = 250  # 轮廓面积下限（按外接矩形 (w-1)*(h-1) 估计）
+MIN_TILE_SIZE = 35   # 牌的宽或高需大于该值
+
+def band_mask(img:np.ndarray)-> np.ndarray:
+    """
+    一次计算灰度带遮罩：像素在某灰度带内 <=> 最小通道 >= 带下限 且 最大通道 <= 带上限，
+    由最小通道查表得到最大通道上限，一次比较即可（与三个 inRange 结果之和等价）
+    """
+    if img.ndim == 2:
+        lo = hi = img
+    else:
+        b, g, r = cv2.split(img)
+        lo = cv2.min(cv2.min(b, g), r)
+        hi = cv2.max(cv2.max(b, g), r)
+    return cv2.compare(hi, cv2.LUT(lo, BAND_LIMIT_LUT), cv2.CMP_LT)
+
+def get_tile_boxes(img:np.ndarray, img_name:str)-> np.ndarray:
     """
-    优化后的轮廓检测函数（向量化+预计算）
+    连通域检测麻将牌，返回 (N, 4) 的外接矩形数组 [x, y, w, h]，
+    面积、位置与包含关系均以向量方式过滤
     """
-    # 预计算图像尺寸和条件
     h, w = img.shape[:2]
-    is_fourth = "Fourth_Mingpai" in img_name
-    is_second = "Second_Mingpai" in img_name
-    
-    # 向量化阈值计算（比原循环快3倍）
-    i_values = np.arange(19, 25, 2)
-    thresholds = [cv2.inRange(img, tuple(map(int, [i*10, i*10, i*10])), tuple(map(int, [i*10+20]*3))) for i in i_values]
-    thresh = np.sum(thresholds, axis=0).astype(np.uint8)
-
-    # 轮廓检测优化
-    contours, hierarchy = cv2.findContours(thresh, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-    valid_boxes = []
-    
-    # 快速遍历轮廓
-    for i, cnt in enumerate(contours):
-        if hierarchy[0][i][3] != -1 or cv2.contourArea(cnt) < 250:
-            continue
-        # 快速边界计算
-        x, y, w_cnt, h_cnt = cv2.boundingRect(cnt)
-        
-        # 条件过滤优化
-        if is_fourth and (x + w_cnt > 0.95*w) and (y + h_cnt > 0.95*h):
-            continue
-        if is_second and (x < 0.05*w) and (y < 0.05*h):
-            continue
-        
-        # 最小矩形计算
-        valid_boxes.append(cv2.boxPoints(cv2.minAreaRect(cnt)).astype(np.int64))
-    
-    return valid_boxes
+    _, _, stats, _ = cv2.connectedComponentsWithStats(band_mask(img), connectivity=8)
+    # 去掉背景，并按标号逆序排列（与 findContours 的输出顺序一致）
+    boxes = stats[:0:-1, :4].astype(np.int64)
+    if len(boxes) == 0:
+        return boxes
+    x, y, bw, bh = boxes.T
+    right, bottom = x + bw, y + bh
+
+    keep = (bw - 1) * (bh - 1) >= MIN_TILE_AREA
+    if "Fourth_Mingpai" in img_name:
+        keep &= ~((right > 0.95*w) & (bottom > 0.95*h))
+    if "Second_Mingpai" in img_name:
+        keep &= ~((x < 0.05*w) & (y < 0.05*h))
+
+    # 只保留最外层连通域：外接矩形被其他连通域包含的视为内部轮廓（对应 RETR_TREE 中有父轮廓）
+    idx = np.flatnonzero(keep)
+    if len(idx):
+        inside = ((x[idx, None] >= x) & (y[idx, None] >= y)
+                  & (right[idx, None] <= right) & (bottom[idx, None] <= bottom))
+        inside[np.arange(len(idx)), idx] = False
+        keep[idx[inside.any(axis=1)]] = False
+
+    # 尺寸过滤：裁剪后需非空，且宽或高大于 MIN_TILE_SIZE
+    keep &= (bw > 3) & (bh > 3) & ((bw - 1 > MIN_TILE_SIZE) | (bh - 1 > MIN_TILE_SIZE))
+    return boxes[keep]
+
+# 手牌横向单行排列：按列投影切分
+HAND_SIZES = (1, 2, 4, 5, 7, 8, 10, 11, 13, 14)  # 副露后手牌为 13-3k 张，摸牌后再 +1
+HAND_ROW_RATIO = 0.05       # 行内牌面像素数低于最大行的该比例视为噪声，其余行的完整纵向范围为牌行
+HAND_HEIGHT_RATIO = 0.9     # 牌行高度下限（相对各牌段自身的纵向范围，即轮廓检测得到的牌高）
+HAND_GAP_RATIO = 0.1        # 列内牌面像素占比低于该值视为牌间缝隙
+HAND_MIN_WIDTH_RATIO = 0.4  # 牌段宽度下限（相对牌高），更窄的视为噪声
+HAND_WIDTH_TOLERANCE = 0.2  # 各牌宽度与平均牌宽的最大相对偏差
+HAND_ASPECT_RANGE = (0.5, 1.0)  # 牌宽 / 牌高的合理范围
+
+def _runs(flags:np.ndarray)-> np.ndarray:
+    """布尔序列中连续 True 段的 (N, 2) [start, end) 数组"""
+    padded = np.concatenate(([False], flags, [False]))
+    return np.flatnonzero(padded[1:] != padded[:-1]).reshape(-1, 2)
+
+def split_hand(img:np.ndarray)-> Optional[list[np.ndarray]]:
+    """
+    手牌专用切分：行投影确定牌行（牌面的完整纵向范围），列投影找牌间缝隙，
+    相连的牌段按平均牌宽等分，返回尺寸一致的牌图像视图；
+    张数不合法、牌宽不一致或牌高明显偏小时返回 None，由轮廓检测兜底
+    """
+    mask = band_mask(img) > 0
+    rows = mask.sum(axis=1)
+    if rows.max() == 0:
+        return None
+    row_runs = _runs(rows >= HAND_ROW_RATIO * rows.max())
+    y0, y1 = max(row_runs.tolist(), key=lambda r: r[1] - r[0])
+    height = y1 - y0
+    if height - 1 <= MIN_TILE_SIZE:
+        return None
+
+    runs = _runs(mask[y0:y1].mean(axis=0) >= HAND_GAP_RATIO)
+    widths = runs[:, 1] - runs[:, 0]
+    valid = widths >= HAND_MIN_WIDTH_RATIO * height
+    runs, widths = runs[valid], widths[valid]
+    if len(runs) == 0:
+        return None
+
+    # 牌行被噪声行截断时牌高偏小：与各牌段自身的纵向范围比较
+    extents = [np.flatnonzero(mask[:, start:end].any(axis=1)) for start, end in runs.tolist()]
+    if height < HAND_HEIGHT_RATIO * np.median([rows[-1] - rows[0] + 1 for rows in extents]):
+        return None
+
+    # 牌间缝隙通常可见，多数牌段为单张：以牌段宽度中位数估计张数，再用全部牌段求平均牌宽
+    counts = np.maximum(np.rint(widths / np.median(widths)), 1).astype(np.int64)
+    unit = widths.sum() / counts.sum()
+    counts = np.maximum(np.rint(widths / unit), 1).astype(np.int64)
+    if counts.sum() not in HAND_SIZES or np.any(np.abs(widths / counts - unit) > HAND_WIDTH_TOLERANCE * unit):
+        return None
+    if not HAND_ASPECT_RANGE[0] <= unit / height <= HAND_ASPECT_RANGE[1]:
+        return None
+
+    tile_w = int(unit)
+    starts = [min(int(start + i * width / count), img.shape[1] - tile_w)
+              for (start, _), width, count in zip(runs.tolist(), widths.tolist(), counts.tolist())
+              for i in range(count)]
+    # 与轮廓检测的输出顺序一致（从右到左），裁剪边框同 extract_tiles
+    return [img[y0+1:y1-2, x+1:x+tile_w-2] for x in reversed(starts)]
 
 def extract_tiles(img:np.ndarray, img_name:str)-> list[np.ndarray]:
     """
-    优化后的麻将牌提取（列表推导式+并行计算）
+    提取麻将牌：返回去掉 1 像素边框的牌图像视图（不复制数据），手牌优先按列投影切分
+    """
+    if "Hand_Tiles" in img_name:
+        tiles = split_hand(img)
+        if tiles is not None:
+            return tiles
+    return crop_boxes(img, get_tile_boxes(img, img_name))
+
+def crop_boxes(img:np.ndarray, boxes:np.ndarray)-> list[np.ndarray]:
+    """按外接矩形裁剪牌图像（去掉 1 像素边框，返回视图）"""
+    return [img[y+1:y+h-2, x+1:x+w-2] for x, y, w, h in boxes.tolist()]
+
+def split_regions(crops:dict[str, np.ndarray])-> dict[str, list[np.ndarray]]:
+    """
+    在内存中对各区域裁剪图提取麻将牌，返回 {区域名: [牌图像, ...]}
     """
-    boxes = get_mahjongs_contours(img, img_name)
-    return [img[y1+1:y2-1, x1+1:x2-1].copy() for box in boxes 
-            if (x1:=min(box[:,0])) < (x2:=max(box[:,0])) 
-            and (y1:=min(box[:,1])) < (y2:=max(box[:,1]))
-            and (x2-x1 > 35 or y2-y1 > 35)]
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = {key: executor.submit(extract_tiles, crop, key) for key, crop in crops.items()}
+
+    region_tiles = {}
+    for key, future in futures.items():
+        try:
+            region_tiles[key] = future.result()
+        except Exception as e:
+            print(f"处理区域 {key} 时发生错误: {str(e)}")
+            region_tiles[key] = []
+    return region_tiles
+
+def save_tiles(region_tiles:dict[str, list[np.ndarray]], img_name:str, output_folder:str)-> None:
+    """
+    调试输出：按 {帧名}_{区域名}/N.png 的目录结构保存切分后的麻将牌
+    """
+    base_name = os.path.splitext(img_name)[0]
+    for key, tiles in region_tiles.items():
+        if not tiles:
+            continue
+        subfolder_path = os.path.join(output_folder, f"{base_name}_{key}")
+        os.makedirs(subfolder_path, exist_ok=True)
+        for i, tile in enumerate(tiles):
+            cv2.imwrite(os.path.join(subfolder_path, f'{i}.png'), tile)
 
 def load_images(file_paths:list)-> dict:
     """
@@ -1,34 +1,37 @@
 import cv2
 import numpy as np
-import paddleocr
 import os
 import logging
-from IMGProcess.DrawPic import safe_rect
+from concurrent.futures import ThreadPoolExecutor
+from IMGProcess.Geometry import RegionGeometry, TILE_HSV_LOWER, TILE_HSV_UPPER, HAND_KERNEL, REGION_KERNEL
 cv2.setNumThreads(4)
 
-def find_all_cards_in_region(img:np.ndarray, regions:dict)-> dict:
-    """在指定区域内查找所有麻将牌"""
-    h_img, w_img = img.shape[:2]
+# 常驻线程池：避免每帧创建线程
+_region_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="FirstSplit")
+
+def tile_mask(hsv:np.ndarray)-> np.ndarray:
+    """白色牌面遮罩（整帧计算一次，各区域取视图）"""
+    return cv2.inRange(hsv, TILE_HSV_LOWER, TILE_HSV_UPPER)
+
+def find_all_cards_in_region(img:np.ndarray, geometry:RegionGeometry, hsv:np.ndarray=None)-> dict:
+    """
+    在指定区域内查找所有麻将牌
+    :param geometry: 当前分辨率的区域几何信息（像素矩形、筛选界限）
+    :param hsv:      整帧 HSV 图（Frame.hsv），缺省时在此计算
+    """
+    regions = geometry.regions
+    rects = geometry.rects
     hand_regions = {}
-    kernel_cache = {
-        'Hand_Tiles': np.ones((17, 17), np.uint8),
-        'default': np.ones((3, 3), np.uint8)
-    }
-    
-    # 预处理颜色范围
-    lower = np.array([0, 0, 180])
-    upper = np.array([180, 60, 255])
+    if hsv is None:
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    white = tile_mask(hsv)
     
     # 优先处理 Hand_Tiles 区域
     if 'Hand_Tiles' in regions:
         key = 'Hand_Tiles'
-        region = regions[key]
-        x1, y1, x2, y2 = safe_rect(region['rect'], h_img, w_img)
-        roi = img[y1:y2, x1:x2]
-        hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-        mask = cv2.inRange(hsv, lower, upper)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel_cache[key])
-        mask = cv2.dilate(mask, kernel_cache[key], iterations=4)
+        x1, y1, _, _ = rects[key]
+        mask = cv2.morphologyEx(geometry.view(white, key), cv2.MORPH_OPEN, HAND_KERNEL)
+        mask = cv2.dilate(mask, HAND_KERNEL, iterations=4)
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         if len(contours) > 0:
             selected = min(contours, key=lambda c: cv2.boundingRect(c)[0])
@@ -37,17 +40,12 @@ def find_all_cards_in_region(img:np.ndarray, regions:dict)-> dict:
                 hand_regions[key] = (x + x1, y + y1, w, h)
     
     # 并行处理其他区域
-    from concurrent.futures import ThreadPoolExecutor
     def process_region(key):
         if key in ['Self_Wind', 'Field_Wind', 'Hand_Tiles']:
             return
-        region = regions[key]
-        x1, y1, x2, y2 = safe_rect(region['rect'], h_img, w_img)
-        roi = img[y1:y2, x1:x2]
-        hsv = cv2.cvtColor(roi, cv2.COLOR_BGR2HSV)
-        mask = cv2.inRange(hsv, lower, upper)
-        kernel = kernel_cache['default']
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        x1, y1, _, _ = rects[key]
+        kernel = REGION_KERNEL
+        mask = cv2.morphologyEx(geometry.view(white, key), cv2.MORPH_OPEN, kernel)
         mask = cv2.dilate(mask, kernel, iterations=5)
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         if not contours:
@@ -61,13 +59,13 @@ def find_all_cards_in_region(img:np.ndarray, regions:dict)-> dict:
                 candidates = [c for c in contours if (cv2.boundingRect(c)[0] + x1) >= right_bound]
                 selected = max(candidates, key=lambda c: cv2.boundingRect(c)[0]) if candidates else None
         elif key == 'Second_Mingpai':
-            candidates = [c for c in contours if (cv2.boundingRect(c)[1] + y1) < (0.15 * h_img)]
+            candidates = [c for c in contours if (cv2.boundingRect(c)[1] + y1) < geometry.second_mingpai_max_y]
             selected = max(candidates, key=cv2.contourArea) if candidates else None
         elif key == 'Third_Mingpai':
-            candidates = [c for c in contours if (cv2.boundingRect(c)[0] + x1) < (0.3 * w_img)]
+            candidates = [c for c in contours if (cv2.boundingRect(c)[0] + x1) < geometry.third_mingpai_max_x]
             selected = max(candidates, key=cv2.contourArea) if candidates else None
         elif key == 'Fourth_Mingpai':
-            candidates = [c for c in contours if (cv2.boundingRect(c)[1] + y1 + cv2.boundingRect(c)[3]) > (0.85 * h_img)
+            candidates = [c for c in contours if (cv2.boundingRect(c)[1] + y1 + cv2.boundingRect(c)[3]) > geometry.fourth_mingpai_min_bottom
                           and cv2.boundingRect(c)[0] + x1 < hand_regions.get('Hand_Tiles', (0, 0, 0, 0))[0]]
             selected = max(candidates, key=cv2.contourArea) if candidates else None
         else:
@@ -80,11 +78,10 @@ def find_all_cards_in_region(img:np.ndarray, regions:dict)-> dict:
                 return (key, (x + x1, y + y1, w, h))
         return None
     
-    with ThreadPoolExecutor() as executor:
-        futures = [executor.submit(process_region, key) 
-                   for key in regions if key not in ['Self_Wind', 'Field_Wind', 'Hand_Tiles']]
-        for future in futures:
-            result = future.result()
-            if result:
-                hand_regions[result[0]] = result[1]
+    futures = [_region_pool.submit(process_region, key) 
+               for key in regions if key not in ['Self_Wind', 'Field_Wind', 'Hand_Tiles']]
+    for future in futures:
+        result = future.result()
+        if result:
+            hand_regions[result[0]] = result[1]
     return hand_regions
\ No newline at end of file
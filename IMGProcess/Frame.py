@@ -0,0 +1,73 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Optional
+import cv2
+import numpy as np
+
+class Frame:
+    """
+    单帧截图：在内存中携带解码后的图像，经 task_queue 传递给各处理阶段，
+    只有在开启调试归档时才写入磁盘
+    """
+    def __init__(self, image:np.ndarray, timestamp:Optional[float]=None, archive_dir:Optional[str]=None):
+        self.image = image  # BGR 图像
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.archive_dir = archive_dir
+        self.name = "game_" + datetime.fromtimestamp(self.timestamp).strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        self._gray = None
+        self._hsv = None
+        self._path = None
+        self._lock = threading.Lock()
+
+    @property
+    def shape(self) -> tuple:
+        return self.image.shape
+
+    @property
+    def gray(self) -> np.ndarray:
+        """灰度图（首次访问时计算并缓存）"""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def hsv(self) -> np.ndarray:
+        """整帧 HSV 图（首次访问时计算并缓存，各区域检测共享其视图）"""
+        if self._hsv is None:
+            self._hsv = cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV)
+        return self._hsv
+
+    @property
+    def path(self) -> Optional[str]:
+        """懒加载的落盘路径：未配置归档目录时返回 None"""
+        if self._path is None and self.archive_dir:
+            self.save(self.archive_dir)
+        return self._path
+
+    def save(self, output_dir:str) -> Optional[str]:
+        """无损保存为 PNG（压缩级别0），同一帧只写一次"""
+        with self._lock:
+            if self._path is None:
+                os.makedirs(output_dir, exist_ok=True)
+                filepath = os.path.join(output_dir, f"{self.name}.png")
+                if cv2.imwrite(filepath, self.image, [cv2.IMWRITE_PNG_COMPRESSION, 0]):
+                    self._path = filepath
+        return self._path
+
+    @classmethod
+    def from_pil(cls, img, timestamp:Optional[float]=None, archive_dir:Optional[str]=None) -> "Frame":
+        """从 PIL(RGB) 截图构建帧，只做一次颜色转换"""
+        return cls(cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR), timestamp, archive_dir)
+
+    @classmethod
+    def from_file(cls, filepath:str) -> Optional["Frame"]:
+        """从磁盘图片构建帧（用于离线调试）"""
+        image = cv2.imread(filepath)
+        if image is None:
+            return None
+        frame = cls(image, os.path.getmtime(filepath))
+        frame.name = os.path.splitext(os.path.basename(filepath))[0]
+        frame._path = filepath
+        return frame
@@ -0,0 +1,75 @@
+import threading
+import numpy as np
+from Config import profile
+
+# 宽高比大于该值视为手机布局
+PHONE_ASPECT = 2
+
+# 区域配置名：(牌区域, 行动者高亮区域)
+REGION_LAYOUTS = {
+    'phone': ('Regions_Phone', 'Yellow_Light_Regions_Phone'),
+    'pc': ('Regions_PC', 'Yellow_Light_Regions_PC')
+}
+
+def _constant(arr:np.ndarray)-> np.ndarray:
+    """只读常量数组，防止被某个识别阶段意外修改"""
+    arr.flags.writeable = False
+    return arr
+
+# 牌面（白色）HSV 范围与形态学核
+TILE_HSV_LOWER = _constant(np.array([0, 0, 180], dtype=np.uint8))
+TILE_HSV_UPPER = _constant(np.array([180, 60, 255], dtype=np.uint8))
+HAND_KERNEL = _constant(np.ones((17, 17), np.uint8))
+REGION_KERNEL = _constant(np.ones((3, 3), np.uint8))
+
+# 行动者黄色高亮 HSV 范围与形态学核
+ACTOR_HSV_LOWER = _constant(np.array([0, 0, 0], dtype=np.uint8))
+ACTOR_HSV_UPPER = _constant(np.array([60, 255, 255], dtype=np.uint8))
+ACTOR_KERNEL = _constant(np.ones((11, 11), np.uint8))
+
+def is_phone_layout(w:int, h:int)-> bool:
+    """按宽高比判断手机 / PC 布局"""
+    return max(w, h) / min(w, h) > PHONE_ASPECT
+
+class RegionGeometry:
+    """
+    某一分辨率下的全部区域几何信息：设备类型、像素矩形与明牌筛选界限，
+    首帧计算一次后各识别阶段共享，按区域名返回零拷贝的 ndarray 视图
+    """
+    def __init__(self, w:int, h:int, config=profile):
+        self.w, self.h = w, h
+        self.version = config.version
+        self.is_phone = is_phone_layout(w, h)
+        regions_name, yellow_name = REGION_LAYOUTS['phone' if self.is_phone else 'pc']
+        self.regions = config[regions_name]
+        self.yellow_regions = config[yellow_name]
+        self.rects = config.pixel_rects(regions_name, w, h)
+        self.yellow_rects = config.pixel_rects(yellow_name, w, h)
+        # 明牌区域轮廓筛选界限（像素）
+        self.second_mingpai_max_y = 0.15 * h
+        self.third_mingpai_max_x = 0.3 * w
+        self.fourth_mingpai_min_bottom = 0.85 * h
+
+    def view(self, img:np.ndarray, key:str)-> np.ndarray:
+        """牌区域视图（不复制数据）"""
+        x1, y1, x2, y2 = self.rects[key]
+        return img[y1:y2, x1:x2]
+
+    def yellow_view(self, img:np.ndarray, key:str)-> np.ndarray:
+        """行动者高亮区域视图（不复制数据）"""
+        x1, y1, x2, y2 = self.yellow_rects[key]
+        return img[y1:y2, x1:x2]
+
+_geometry_cache = {}  # (w, h) -> RegionGeometry
+_geometry_lock = threading.Lock()
+
+def get_geometry(w:int, h:int, config=profile)-> RegionGeometry:
+    """按分辨率缓存的区域几何信息，配置热重载后自动重建"""
+    geometry = _geometry_cache.get((w, h))
+    if geometry is None or geometry.version != config.version:
+        with _geometry_lock:
+            geometry = _geometry_cache.get((w, h))
+            if geometry is None or geometry.version != config.version:
+                geometry = RegionGeometry(w, h, config)
+                _geometry_cache[(w, h)] = geometry
+    return geometry
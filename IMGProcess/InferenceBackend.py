@@ -0,0 +1,135 @@
+import os
+import numpy as np
+import torch
+import torch.nn as nn
+
+# 导出模型时使用的示例输入尺寸（NCHW）
+EXAMPLE_SHAPE = (1, 3, 32, 32)
+
+def quantize_model(model:nn.Module)-> nn.Module:
+    """int8 动态量化（仅全连接层，CPU 推理）"""
+    return torch.ao.quantization.quantize_dynamic(model.cpu().eval(), {nn.Linear}, dtype=torch.qint8)
+
+def export_torchscript(model:nn.Module, path:str)-> str:
+    """导出 TorchScript 模型"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with torch.no_grad():
+        scripted = torch.jit.trace(model.cpu().eval(), torch.zeros(EXAMPLE_SHAPE))
+    try:
+        scripted = torch.jit.freeze(scripted)  # 常量折叠，减少调度开销
+    except RuntimeError as e:
+        print(f"⚠️ TorchScript freeze 失败，保存未冻结模型: {e}")
+    scripted.save(path)
+    print(f"📦 TorchScript 模型已导出: {path}")
+    return path
+
+def export_onnx(model:nn.Module, path:str, quantize:bool=False)-> str:
+    """导出 ONNX 模型（批大小可变），可选 int8 动态量化"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.onnx.export(
+        model.cpu().eval(), torch.zeros(EXAMPLE_SHAPE), path,
+        input_names=["input"], output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=13
+    )
+    print(f"📦 ONNX 模型已导出: {path}")
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        int8_path = quantized_path(path)
+        quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+        print(f"📦 ONNX int8 模型已导出: {int8_path}")
+        return int8_path
+    return path
+
+def is_stale(path:str, source:str=None)-> bool:
+    """导出文件不存在，或早于源权重文件（重新训练后）时需要重新导出"""
+    if not os.path.exists(path):
+        return True
+    if source and os.path.exists(source) and os.path.getmtime(path) < os.path.getmtime(source):
+        print(f"⚠️ 导出模型早于权重文件，重新导出: {path}")
+        return True
+    return False
+
+def quantized_path(path:str)-> str:
+    """量化模型文件名：tile.onnx → tile.int8.onnx"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.int8{ext}"
+
+class TorchBackend:
+    """PyTorch eager 推理"""
+    name = "torch"
+
+    def __init__(self, model:nn.Module, device:torch.device):
+        self.device = device
+        self.model = model.to(device).eval()
+
+    def __call__(self, batch:np.ndarray)-> np.ndarray:
+        with torch.no_grad():
+            return self.model(torch.from_numpy(batch).to(self.device)).cpu().numpy()
+
+
+class TorchScriptBackend:
+    """TorchScript 推理（去掉 Python 层调度开销）"""
+    name = "torchscript"
+
+    def __init__(self, path:str, device:torch.device):
+        self.device = device
+        self.model = torch.jit.load(path, map_location=device).eval()
+
+    def __call__(self, batch:np.ndarray)-> np.ndarray:
+        with torch.no_grad():
+            return self.model(torch.from_numpy(batch).to(self.device)).cpu().numpy()
+
+
+class OnnxBackend:
+    """ONNX Runtime CPU 推理"""
+    name = "onnx"
+
+    def __init__(self, path:str, threads:int=0):
+        import onnxruntime as ort  # 可选依赖，仅在选用该后端时导入
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch:np.ndarray)-> np.ndarray:
+        return self.session.run(None, {self.input_name: batch})[0]
+
+
+def create_backend(model:nn.Module, cfg:dict, device:torch.device, source:str=None):
+    """
+    按配置创建推理后端，导出文件不存在或早于权重文件时自动从 eager 模型导出
+    :param model:  已加载权重的 eager 模型
+    :param cfg:    profile['Inference']
+    :param source: 权重文件路径（tile.model），用于判断导出文件是否过期
+    """
+    kind = cfg.get("Backend", "torch").lower()
+    quantize = cfg.get("Quantize", False)
+    threads = cfg.get("Threads", 0)
+    if threads:
+        torch.set_num_threads(threads)
+
+    # 动态量化只支持 CPU
+    if quantize and kind != "onnx":
+        model, device = quantize_model(model), torch.device("cpu")
+
+    if kind == "torchscript":
+        path = cfg["TorchScriptPath"]
+        if quantize:
+            path = quantized_path(path)
+        if is_stale(path, source):
+            export_torchscript(model, path)
+        return TorchScriptBackend(path, device)
+
+    if kind == "onnx":
+        path = cfg["OnnxPath"]
+        target = quantized_path(path) if quantize else path
+        if is_stale(target, source):
+            target = export_onnx(model, path, quantize)
+        return OnnxBackend(target, threads)
+
+    if kind != "torch":
+        print(f"⚠️ 未知推理后端 {kind}，使用 torch")
+    return TorchBackend(model, device)
@@ -0,0 +1,94 @@
+import numpy as np
+from IMGProcess.FinalSplit import get_tile_boxes, crop_boxes
+from IMGProcess.ChangeDetector import perceptual_hash, hamming_distance
+from IMGProcess.Prediction import TilePrediction
+
+DISCARD_KEYS = ('Self_Discard', 'Second_Discard', 'Third_Discard', 'Fourth_Discard')
+
+# 各家牌河的排列方向：(换行方向坐标轴, 符号, 行内方向坐标轴, 符号)，坐标轴 0=x 1=y
+POND_AXES = {
+    'Self_Discard': (1, 1, 0, 1),     # 行向下，行内从左到右
+    'Second_Discard': (0, 1, 1, -1),  # 行向右，行内从下到上
+    'Third_Discard': (1, -1, 0, -1),  # 行向上，行内从右到左
+    'Fourth_Discard': (0, -1, 1, 1),  # 行向左，行内从上到下
+}
+ROW_GAP_RATIO = 0.5  # 相邻牌中心在换行方向上的间距超过牌尺寸的该比例视为换行
+HASH_DISTANCE = 10   # 已知槽位的图像哈希距离超过该值视为牌河被重置
+
+def order_pond_boxes(boxes:np.ndarray, key:str)-> np.ndarray:
+    """将牌河中的牌按出牌顺序排列（先按行，再按行内位置）"""
+    if len(boxes) < 2:
+        return boxes
+    row_axis, row_sign, col_axis, col_sign = POND_AXES[key]
+    centers = boxes[:, :2] + boxes[:, 2:] / 2
+    rows_pos = row_sign * centers[:, row_axis]
+    cols_pos = col_sign * centers[:, col_axis]
+    extent = np.median(boxes[:, 2 + row_axis])  # 牌在换行方向上的尺寸
+
+    order = np.argsort(rows_pos, kind="stable")
+    rows = np.empty(len(boxes), np.int64)
+    rows[order] = np.concatenate(([0], np.cumsum(np.diff(rows_pos[order]) > ROW_GAP_RATIO * extent)))
+    return boxes[np.lexsort((cols_pos, rows))]
+
+class PondTracker:
+    """
+    牌河增量跟踪：牌河只会按固定顺序追加，已识别的槽位沿用缓存结果，
+    每帧只识别新增槽位；已知最后一张牌的图像变化或张数减少时视为重置（一局结束）
+    切分仍对整个牌河区域做连通域检测（不按槽位预测只检查下一格）：区域裁剪框随牌河增长而移动，
+    立直横置的牌也会打乱固定的槽位间距；切分只在区域变化检测判定牌河变化时执行，耗时远小于识别
+    """
+    def __init__(self, hash_distance:int=HASH_DISTANCE):
+        self.hash_distance = hash_distance
+        self.predictions = {key: [] for key in DISCARD_KEYS}  # 已确认的识别结果（按出牌顺序）
+        self.hashes = {key: [] for key in DISCARD_KEYS}       # 已确认槽位的图像哈希
+        self.pending = {}  # 区域名 -> (本帧牌图像, 首个待识别槽位)
+
+    def reset(self, key:str=None)-> None:
+        """清空一家（或全部）牌河"""
+        for k in (DISCARD_KEYS if key is None else (key,)):
+            self.predictions[k] = []
+            self.hashes[k] = []
+            self.pending.pop(k, None)
+
+    def split(self, crops:dict[str, np.ndarray])-> dict[str, list[np.ndarray]]:
+        """切分牌河区域并按出牌顺序排列，记录各区域需要重新识别的槽位"""
+        region_tiles = {}
+        for key, crop in crops.items():
+            tiles = crop_boxes(crop, order_pond_boxes(get_tile_boxes(crop, key), key))
+            region_tiles[key] = tiles
+            self.pending[key] = (tiles, self._sync(key, tiles))
+        return region_tiles
+
+    def _sync(self, key:str, tiles:list[np.ndarray])-> int:
+        """与已知牌河对齐，返回首个需要识别的槽位"""
+        count = len(tiles)
+        known = len(self.hashes[key])
+        if count == known - 1:
+            # 最后一张被鸣牌拿走
+            self.predictions[key] = self.predictions[key][:count]
+            self.hashes[key] = self.hashes[key][:count]
+            known = count
+        if count < known or (known and hamming_distance(perceptual_hash(tiles[known - 1]), self.hashes[key][-1]) > self.hash_distance):
+            self.reset(key)
+            return 0
+        return known
+
+    def to_classify(self, key:str)-> list[np.ndarray]:
+        """本帧需要识别的牌图像"""
+        tiles, start = self.pending[key]
+        return tiles[start:]
+
+    def commit(self, key:str, predictions:list[TilePrediction], is_valid=None)-> list[TilePrediction]:
+        """
+        合并新增槽位的识别结果，返回完整牌河的识别结果；
+        只有连续有效的结果会被缓存，其余（如出牌动画中的牌）下一帧重新识别
+        """
+        tiles, start = self.pending.pop(key)
+        confirmed = 0
+        for prediction in predictions:
+            if is_valid is not None and not is_valid(prediction):
+                break
+            confirmed += 1
+        self.predictions[key] = self.predictions[key][:start] + list(predictions[:confirmed])
+        self.hashes[key] = self.hashes[key][:start] + [perceptual_hash(tile) for tile in tiles[start:start + confirmed]]
+        return self.predictions[key][:start] + list(predictions)
@@ -0,0 +1,9 @@
+from typing import NamedTuple
+
+# 识别结果类型单独成模块：下游模块只引用结果类型时不必导入 torch
+class TilePrediction(NamedTuple):
+    """单张牌的识别结果"""
+    label: str          # 最优牌名
+    confidence: float   # 最优牌名的 softmax 概率
+    candidates: tuple   # top-k 候选 ((牌名, 概率), ...)，按概率降序
+    reconciled: bool = False  # 是否因张数超限被替换为次优候选（置信度仍为原识别结果的置信度）
@@ -2,13 +2,17 @@ import os
 import cv2
 import numpy as np
 
+def crop_regions(img:np.ndarray, hand_regions:dict, padding:int=20)-> dict[str, np.ndarray]:
+    """在内存中裁剪各区域（返回视图，不拷贝）"""
+    h, w = img.shape[:2]
+    return {key: img[max(0,y-padding):min(h,y+h_+padding), max(0,x-padding):min(w,x+w_+padding)]
+            for key, (x, y, w_, h_) in hand_regions.items()}
+
 def save_cropped_regions(img:np.ndarray, hand_regions:dict, img_name:str, output_folder:str)-> str:
     """保存裁剪后的区域"""
     base_name = os.path.splitext(img_name)[0]
     save_path = os.path.join(output_folder, base_name)
     os.makedirs(save_path, exist_ok=True)
-    h, w = img.shape[:2]
-    for key, (x, y, w_, h_) in hand_regions.items():
-        cropped = img[max(0,y-20):min(h,y+h_+20), max(0,x-20):min(w,x+w_+20)]
+    for key, cropped in crop_regions(img, hand_regions).items():
         cv2.imwrite(os.path.join(save_path, f"{base_name}_{key}.{img_name.split('.')[-1]}"), cropped)
     return save_path
\ No newline at end of file
@@ -1,51 +1,55 @@
 import os
-import cv2
 import json
-from tqdm import tqdm
-from pathlib import Path
+import numpy as np
 from typing import List, Dict
-from deepdiff import DeepDiff
-from concurrent.futures import ThreadPoolExecutor
 from IMGProcess.BatchClassify import BatchClassifier
+from IMGProcess.Prediction import TilePrediction
+from IMGProcess.PondTracker import PondTracker, DISCARD_KEYS
+from StateChannel import board_channel
 from typing import Optional
-from collections import Counter
+import TileCodec
+import Shanten
+
+from Config import profile
 
-with open("Data/json/profile.json", "r", encoding="utf-8") as f:
-    profile = json.load(f)
 class GameStateGenerator(BatchClassifier):
     """
-    游戏状态生成器
+    游戏状态生成器（常驻复用，风位与游戏状态按帧传入）
     """
-    def __init__(self, self_wind, field_wind, GameState=None):
+    def __init__(self):
         super().__init__()
-        self.folder_list = None
-        self.parent_folder = profile['PATH']['Split_FinalPath']
+        self.region_tiles = {}
+        self.reuse_regions = set()    # 本帧未变化、沿用缓存结果的区域
+        self.prediction_cache = {}    # 区域名 -> 上次识别结果
+        self.pond_tracker = PondTracker()  # 牌河增量识别
         self.last_game_state = {}
+        self.SelfWind = None
+        self.FieldWind = None
+        self.GameState = None
+        self.seatlist = [1, 2, 3, 17457800]
+        self.seat_map = {}
+        self.reverse_seat_map = []
+
+    def update_context(self, self_wind, field_wind, GameState=None) -> None:
+        """更新当前帧的自风、场风和游戏状态"""
         self.SelfWind = self_wind
         self.FieldWind = field_wind
         self.GameState = GameState
-        self.seatlist = [1, 2, 3, 17457800]
         self.seat_map = {}
         self.reverse_seat_map = []
 
-    def find_subfolders_with_suffix_scandir(self, filename: str) -> None:
-        """使用 os.scandir() 高效查找一级子文件夹是否匹配 filename_后缀"""
-
+    def set_region_tiles(self, region_tiles: Dict[str, List[np.ndarray]], reuse=()) -> None:
+        """
+        设置当前帧各区域切分出的牌图像（内存传递，取代逐目录扫描）
+        :param reuse: 未发生变化的区域，直接沿用上次的识别结果
+        """
         suffixes = profile['Suffix']['Suffix']
-        expected_names = {f"{filename}_{sfx}": sfx for sfx in suffixes}
-        folder_list = {sfx: None for sfx in suffixes}
-
-        try:
-            for entry in os.scandir(self.parent_folder):
-                if entry.is_dir() and entry.name in expected_names:
-                    suffix = expected_names[entry.name]
-                    folder_list[suffix] = entry.name
-        except FileNotFoundError:
-            print(f"❌ 文件夹路径不存在: {self.parent_folder}")
-        except Exception as e:
-            print(f"❌ 扫描文件夹时出错: {e}")
-
-        self.folder_list = folder_list
+        self.region_tiles = {sfx: region_tiles.get(sfx) or [] for sfx in suffixes}
+        self.reuse_regions = {key for key in reuse if key in self.prediction_cache}
+        # 重新识别但未切分出牌河的区域（牌河为空）
+        for key in DISCARD_KEYS:
+            if key not in self.reuse_regions and key not in self.pond_tracker.pending:
+                self.pond_tracker.reset(key)
 
     def update_seat_map(self) -> bool:
         """根据自风和场风更新座位映射关系"""
@@ -94,74 +98,102 @@ class GameStateGenerator(BatchClassifier):
             return False
 
 
-    def process_tiles(self) -> Dict[str, List[str]]:
-        """多线程处理各类麻将图片，返回每类牌的识别结果"""
+    def classify_regions(self) -> Dict[str, List[TilePrediction]]:
+        """将本帧所有区域的牌合并为一个批次，一次前向推理后按区域拆分结果"""
+        keys, batch = [], []
+        for key, tiles in self.region_tiles.items():
+            if key == "Wind" or key in self.reuse_regions:
+                continue
+            if key == "Dora_Indicator":
+                tiles = tiles[-1:]  # 只识别最新的指示牌
+            elif key in self.pond_tracker.pending:
+                tiles = self.pond_tracker.to_classify(key)  # 牌河只识别新增槽位
+            keys.append((key, len(tiles)))
+            batch.extend(tiles)
+
+        results = self.classify_batch(batch)
+
+        start = 0
+        for key, count in keys:
+            if key in self.pond_tracker.pending:
+                self.prediction_cache[key] = self.pond_tracker.commit(key, results[start:start + count], self.is_valid_prediction)
+            else:
+                self.prediction_cache[key] = results[start:start + count]
+            start += count
+
+        # 返回副本，修正步骤不影响缓存
+        return {key: list(self.prediction_cache[key]) for key in self.region_tiles
+                if key != "Wind" and key in self.prediction_cache}
+
+    @staticmethod
+    def is_valid_prediction(prediction: TilePrediction) -> bool:
+        """过滤牌背、识别异常和低置信度的结果（拒识阈值每次读取配置，支持热重载）"""
+        return (prediction.label not in ("back", "error") and "error" not in prediction.label
+                and prediction.confidence >= profile['Classify']['RejectThreshold'])
+
+    def reconcile_tile_counts(self, predictions: Dict[str, List[TilePrediction]]) -> bool:
+        """
+        修正超过实际张数的识别结果（每种牌最多4张，红五最多1张）：将该牌中置信度最低的几张
+        替换为各自的次优候选，候选牌本身不得因此超限；无法修正时返回 False
+        """
+        entries = [(key, i) for key, results in predictions.items()
+                   if key not in ("Dora_Indicator", "Wind")
+                   for i, prediction in enumerate(results) if self.is_valid_prediction(prediction)]
+        counts = TileCodec.counts(predictions[key][i].label for key, i in entries)
+        min_prob = profile['Classify']['ReconcileMinProb']  # 候选牌可用于修正的最低概率
+
+        def exceeds(index: int) -> bool:
+            if index in TileCodec.RED_FIVES:
+                return counts[index] > 1
+            return TileCodec.fold(counts)[index] > 4
+
+        def fits(tile: str) -> bool:
+            index = TileCodec.encode(tile)
+            return (TileCodec.fold(counts)[TileCodec.FOLD[index]] < 4
+                    and (index not in TileCodec.RED_FIVES or counts[index] == 0))
+
+        for tile in TileCodec.over_limit(counts):
+            index = TileCodec.encode(tile)
+            is_red = index in TileCodec.RED_FIVES
+            # 置信度从低到高依次尝试替换（普通牌超限时红五也计入同一种牌）
+            same_tiles = sorted((entry for entry in entries
+                                 if (predictions[entry[0]][entry[1]].label == tile if is_red
+                                     else TileCodec.kind(predictions[entry[0]][entry[1]].label) == index)),
+                                key=lambda entry: predictions[entry[0]][entry[1]].confidence)
+            for key, i in same_tiles:
+                if not exceeds(index):
+                    break
+                prediction = predictions[key][i]
+                alternative = next((candidate for candidate in prediction.candidates[1:]
+                                    if TileCodec.is_tile(candidate[0]) and candidate[1] >= min_prob
+                                    and (is_red or TileCodec.kind(candidate[0]) != index)
+                                    and fits(candidate[0])), None)
+                if alternative is None:
+                    continue
+                print(f"🔧 {key}[{i}] {prediction.label}({prediction.confidence:.2f}) → {alternative[0]}({alternative[1]:.2f})")
+                # 保留原置信度并标记为已修正：候选概率通常低于拒识阈值，否则该牌会在 process_tiles 中被丢弃
+                predictions[key][i] = prediction._replace(label=alternative[0], reconciled=True)
+                counts[TileCodec.encode(prediction.label)] -= 1
+                counts[TileCodec.encode(alternative[0])] += 1
+
+            if exceeds(index):
+                return False
+        return True
+
+    def process_tiles(self, predictions: Dict[str, List[TilePrediction]]) -> Dict[str, List[str]]:
+        """整理批量识别结果，返回每类牌的识别结果"""
         print("🀄 正在识别手牌...")
         valid_tiles = {}
 
-        for key, folder in self.folder_list.items():
+        for key, results in predictions.items():
             if key in ("Dora_Indicator", "Wind"):
                 continue
-            
-            # 文件夹不存在时跳过该类牌
-            if not folder:
-                valid_tiles[key] = []
-                continue
-
-            tile_folder_path = Path(profile['PATH']['Split_FinalPath']) / folder
-            if not tile_folder_path.exists() or not tile_folder_path.is_dir():
-                print(f"⚠️ 牌面文件夹不存在或无效: {tile_folder_path}")
-                valid_tiles[key] = []
-                continue
-
-            tile_paths = list(tile_folder_path.iterdir())
-            if not tile_paths:
-                valid_tiles[key] = []
-                continue
 
-            # 多线程识别
-            tile_results = []
-            with ThreadPoolExecutor(max_workers=4) as executor:
-                futures = {executor.submit(self.process_single_image, str(img_path)): img_path.name for img_path in tile_paths}
-
-                for future in tqdm(futures, desc=f"识别 {key}", unit="张"):
-                    try:
-                        filename, tile_name = future.result()
-                        if tile_name not in ("back", "error") and "error" not in tile_name:
-                            tile_results.append(tile_name)
-                    except Exception as e:
-                        print(f"❌ 识别失败：{futures[future]}，错误信息：{e}")
-
-            valid_tiles[key] = tile_results
+            valid_tiles[key] = [prediction.label for prediction in results if self.is_valid_prediction(prediction)]
 
         return valid_tiles
 
 
-    def get_dora_indicator_path(self) -> str:
-        """获取最新的宝牌指示牌图片路径"""
-        folder_name = self.folder_list.get("Dora_Indicator")
-        if not folder_name:
-            print("⚠️ 未找到宝牌指示牌文件夹（Dora_Indicator）")
-            return None
-        
-        dora_path = Path(profile['PATH']['Split_FinalPath']) / folder_name
-        if not dora_path.exists() or not dora_path.is_dir():
-            print(f"⚠️ 路径不存在或不是文件夹: {dora_path}")
-            return None
-        
-        dora_files = sorted(
-            dora_path.glob("*"),
-            key=lambda x: x.stat().st_mtime,
-            reverse=True
-        )
-
-        if not dora_files:
-            print(f"⚠️ 宝牌指示牌文件夹中无图片文件: {dora_path}")
-            return ""
-
-        return str(dora_files[0])
-
-
     def calculate_real_dora(self, indicator_tile: str) -> str:
         """
         根据宝牌指示牌计算真正的宝牌。
@@ -197,19 +229,18 @@ class GameStateGenerator(BatchClassifier):
         return "unknown"
 
 
-    def recognize_dora(self) -> List[str]:
-        """识别宝牌指示牌并计算真实宝牌"""
+    def recognize_dora(self, predictions: Dict[str, List[TilePrediction]]) -> List[str]:
+        """根据宝牌指示牌的识别结果计算真实宝牌"""
         print("正在识别宝牌指示牌...")
-        dora_path = self.get_dora_indicator_path()
-        if not dora_path:
+        dora_predictions = predictions.get("Dora_Indicator")
+        if not dora_predictions:
+            print("⚠️ 未找到宝牌指示牌（Dora_Indicator）")
             return None
         try:
-            # 识别指示牌
-            img = cv2.imread(dora_path)
-            if img is None:
-                return None
-            
-            indicator_tile = self.classifier(img)
+            # 指示牌已在批量推理中识别（只识别了最新的一张）
+            indicator_tile = dora_predictions[-1].label
+            if "error" in indicator_tile:
+                raise ValueError(indicator_tile)
             real_dora = self.calculate_real_dora(indicator_tile)
             # #无需计算，直接给出即可
             # real_dora = indicator_tile
@@ -246,9 +277,12 @@ class GameStateGenerator(BatchClassifier):
 
         self.update_seat_map()
 
-        # 预处理所需信息
-        tiles = self.process_tiles()
-        doras = self.recognize_dora()
+        # 预处理所需信息（整帧一次批量推理）
+        predictions = self.classify_regions()
+        if not self.reconcile_tile_counts(predictions):
+            print("⚠️ 低置信度牌无法修正，部分牌数量仍超过4张")
+        tiles = self.process_tiles(predictions)
+        doras = self.recognize_dora(predictions)
 
         # 基本有效性校验
         if tiles is None or doras is None or self.reverse_seat_map is None:
@@ -260,7 +294,7 @@ class GameStateGenerator(BatchClassifier):
             return None
 
         # 正常状态，返回结构
-        return {
+        board_state = {
             "state": self.GameState,
             "FieldWind": self.FieldWind,
             "SelfWind": self.SelfWind,
@@ -268,21 +302,33 @@ class GameStateGenerator(BatchClassifier):
             "tiles": tiles,
             "doras": doras
         }
-    def check_tile_counts_valid(self, tiles: Dict[str, List[str]]) -> bool:
-        all_tiles = []
+        if profile['Shanten']['Enabled']:
+            board_state["Shanten"] = self.evaluate_hand(tiles, doras)
+        return board_state
 
+    def evaluate_hand(self, tiles: Dict[str, List[str]], doras: List[str]) -> Optional[Dict]:
+        """手牌向听数与有效牌（张数不合理时为 None，多为漏识别 / 多识别）"""
+        visible = TileCodec.kind_counts(doras)
+        for key, value in tiles.items():
+            if key != 'Hand_Tiles':
+                visible += TileCodec.kind_counts(value)
+        result = Shanten.get_evaluator().evaluate(tiles.get('Hand_Tiles', []), visible)
+        if result is None:
+            print(f"⚠️ 手牌张数或牌数不合理，疑似识别异常: {tiles.get('Hand_Tiles', [])}")
+        return result
+
+    def check_tile_counts_valid(self, tiles: Dict[str, List[str]]) -> bool:
+        """所有区域的牌合计不得超过实际张数（每种4张，红五各1张）"""
+        counts = np.zeros(TileCodec.N_SLOTS, dtype=np.int64)
         for key, value in tiles.items():
             # 只处理值为 List[str] 的字段
             if isinstance(value, list) and all(isinstance(t, str) for t in value):
-                all_tiles.extend(value)
+                counts += TileCodec.counts(value)
 
-        tile_counter = Counter(all_tiles)
-
-        for tile, count in tile_counter.items():
-            if count > 4:
-                print(f"⚠️ 牌 {tile} 出现了 {count} 次，超过4张")
-                return False
-        return True
+        over = TileCodec.over_limit(counts)
+        for tile in over:
+            print(f"⚠️ 牌 {tile} 超过实际张数")
+        return not over
 
     def save_board_state(self, output_path: str, verbose: bool = True) -> bool:
         """保存游戏状态到JSON文件"""
@@ -302,6 +348,9 @@ class GameStateGenerator(BatchClassifier):
         if verbose:
             print(f"🀄️ 当前牌局状态：{board_state}")
 
+        # 先发布给动作检测（进程内通道），文件仅作快照与跨进程兼容
+        board_channel.publish(board_state)
+
         try:
             with open(output_path, 'w', encoding='utf-8') as f:
                 json.dump(board_state, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,27 @@
+import threading
+import numpy as np
+from typing import Optional
+from IMGProcess.ChangeDetector import perceptual_hash, hamming_distance
+
+class WindCache:
+    """风牌识别结果缓存：以风牌 ROI 的感知哈希为键，哈希变化时失效"""
+    def __init__(self, max_distance:int=4):
+        self.max_distance = max_distance  # 哈希汉明距离不超过该值视为同一画面
+        self.entries = {}                 # 风牌区域 -> (哈希, 识别结果)
+        self.lock = threading.Lock()
+
+    def lookup(self, wind_type:str, roi:np.ndarray)-> tuple[int, Optional[list]]:
+        """返回 (ROI 哈希, 缓存结果)；未命中时结果为 None"""
+        roi_hash = perceptual_hash(roi)
+        with self.lock:
+            entry = self.entries.get(wind_type)
+        if entry and hamming_distance(entry[0], roi_hash) <= self.max_distance:
+            return roi_hash, entry[1]
+        return roi_hash, None
+
+    def store(self, wind_type:str, roi_hash:int, texts:list)-> None:
+        """缓存识别结果（空结果不缓存）"""
+        if not texts:
+            return
+        with self.lock:
+            self.entries[wind_type] = (roi_hash, texts)
@@ -0,0 +1,183 @@
+import os
+import threading
+import cv2
+import numpy as np
+from functools import lru_cache
+from typing import Optional
+
+GLYPH_SIZE = 32
+
+# 风牌编码 ↔ 风字（模板文件名使用编码前缀，如 1z_Self_Wind_0.png）
+WIND_CODES = {"1z": "東", "2z": "南", "3z": "西", "4z": "北"}
+CHAR_CODES = {"東": "1z", "东": "1z", "南": "2z", "西": "3z", "北": "4z"}
+
+def normalize_glyph(roi:np.ndarray)-> np.ndarray:
+    """灰度化并缩放到固定尺寸"""
+    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+    return cv2.resize(gray, (GLYPH_SIZE, GLYPH_SIZE), interpolation=cv2.INTER_AREA)
+
+class WindGlyphRecognizer:
+    """
+    轻量风字识别：将风牌 ROI 与东/南/西/北的模板逐一做归一化相关匹配。
+    模板由 build_templates 离线从截图裁剪生成，运行时只读，不写磁盘
+    """
+    def __init__(self, template_dir:Optional[str]=None, match_score:float=0.85):
+        self.template_dir = template_dir
+        self.match_score = match_score
+        self.templates = {}  # 风牌区域 -> [(风牌编码, 模板)]
+        if template_dir and os.path.isdir(template_dir):
+            self._load(template_dir)
+
+    def _load(self, template_dir:str)-> None:
+        """读取 {编码}_{区域}_{序号}.png 形式的模板"""
+        for file in sorted(os.listdir(template_dir)):
+            parts = os.path.splitext(file)[0].split("_")
+            if len(parts) < 2 or parts[0] not in WIND_CODES:
+                continue
+            img = cv2.imread(os.path.join(template_dir, file), 0)
+            if img is not None:
+                wind_type = "_".join(parts[1:-1]) if len(parts) > 2 else parts[1]
+                self.templates.setdefault(wind_type, []).append((parts[0], normalize_glyph(img)))
+        count = sum(len(v) for v in self.templates.values())
+        print(f"🀀 已加载 {count} 个风字模板")
+
+    def match(self, wind_type:str, roi:np.ndarray)-> tuple[Optional[str], float]:
+        """返回最相似模板的 (风牌编码, 得分)，没有模板时为 (None, 0)"""
+        templates = self.templates.get(wind_type, [])
+        if not templates or roi is None or roi.size == 0:
+            return None, 0
+        glyph = normalize_glyph(roi)
+        best_code, best_score = None, 0
+        for code, template in templates:
+            score = cv2.matchTemplate(glyph, template, cv2.TM_CCOEFF_NORMED)[0][0]
+            if score > best_score:
+                best_code, best_score = code, score
+        return best_code, best_score
+
+    def recognize(self, wind_type:str, roi:np.ndarray)-> Optional[list]:
+        """返回 [风字]；没有足够相似的模板时返回 None"""
+        code, score = self.match(wind_type, roi)
+        return [WIND_CODES[code]] if code and score >= self.match_score else None
+
+
+@lru_cache(maxsize=None)
+def init_ocr():
+    """延迟加载 PaddleOCR（可选依赖，仅在模板无法识别时使用）"""
+    import paddleocr
+    return paddleocr.PaddleOCR(use_angle_cls=True, lang="ch", show_log=False)
+
+class OcrReader:
+    """PaddleOCR 兜底识别，线程安全"""
+    def __init__(self):
+        self._ocr_lock = threading.Lock()  # 多线程互斥锁
+        self._ocr_warmed_up = False
+
+    @property
+    def ocr(self):
+        return init_ocr()  # 单例初始化
+
+    def warm_up(self):
+        """只预热一次"""
+        if not self._ocr_warmed_up:
+            try:
+                dummy_img = np.random.randint(0, 255, (64,64,3), dtype=np.uint8)
+                with self._ocr_lock:
+                    self.ocr.ocr(dummy_img)
+                self._ocr_warmed_up = True
+                print("🔥 OCR预热完成")
+            except Exception as e:
+                print(f"🔥 OCR预热失败: {str(e)}")
+
+    def recognize(self, roi: np.ndarray) -> list:
+        """OCR识别"""
+        if roi is None or roi.size == 0:
+            print("🆑 空输入数据")
+            return []
+
+        if not roi.flags['C_CONTIGUOUS']:
+            roi = np.ascontiguousarray(roi)
+        if roi.dtype != np.uint8:
+            roi = roi.astype(np.uint8)
+        if len(roi.shape) == 2:
+            roi = cv2.cvtColor(roi, cv2.COLOR_GRAY2RGB)
+        elif roi.shape[2] == 4:
+            roi = cv2.cvtColor(roi, cv2.COLOR_BGRA2RGB)
+        else:
+            roi = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)
+
+        if roi.shape[0] < 5 or roi.shape[1] < 5:
+            print(f"📏 忽略过小区域: {roi.shape}")
+            return []
+
+        # 模型预热（只执行一次）
+        self.warm_up()
+
+        try:
+            with self._ocr_lock:
+                results = self.ocr.ocr(roi, det=False, cls=True)
+        except Exception as e:
+            print(f"❌ OCR异常: {str(e)}")
+            return []
+
+        recognized_texts = []
+        for res in results:
+            if isinstance(res, list):
+                for line in res:
+                    if isinstance(line, tuple) and len(line) == 2 and isinstance(line[0], str):
+                        recognized_texts.append(line[0])
+                    else:
+                        print(f"⚠️ Unexpected OCR result structure: {line}")
+
+        return recognized_texts if recognized_texts else ""
+
+
+def build_templates(image_folder:str, output_dir:str, labels:Optional[dict]=None, match_score:float=0.85)-> None:
+    """
+    离线从已有截图中裁剪风牌区域并保存为模板（与已有模板足够相似的 ROI 跳过）
+    :param labels: {截图文件名（不含扩展名）: {风牌区域: 风牌编码}}，人工标注；
+                   为 None 时借助 PaddleOCR 标注，未标注的区域跳过
+    """
+    from IMGProcess.Geometry import get_geometry
+
+    recognizer = WindGlyphRecognizer(output_dir, match_score)
+    reader = OcrReader() if labels is None else None
+    os.makedirs(output_dir, exist_ok=True)
+    for root, _, files in os.walk(image_folder):
+        for file in sorted(files):
+            img = cv2.imread(os.path.join(root, file))
+            if img is None:
+                continue
+            h, w = img.shape[:2]
+            geometry = get_geometry(w, h)
+            name = os.path.splitext(file)[0]
+            for wind_type in ("Self_Wind", "Field_Wind"):
+                roi = geometry.view(img, wind_type)
+                if recognizer.recognize(wind_type, roi) is not None:
+                    continue
+                if labels is None:
+                    texts = reader.recognize(roi)
+                    code = next((CHAR_CODES[c] for c in CHAR_CODES if texts and c in texts[0]), None)
+                else:
+                    code = labels.get(name, {}).get(wind_type)
+                if code not in WIND_CODES:
+                    continue
+                templates = recognizer.templates.setdefault(wind_type, [])
+                path = os.path.join(output_dir, f"{code}_{wind_type}_{len(templates)}.png")
+                templates.append((code, normalize_glyph(roi)))
+                cv2.imwrite(path, roi)
+                print(f"🀀 生成风字模板: {name} {wind_type} → {WIND_CODES[code]} ({path})")
+
+if __name__ == '__main__':
+    # 用法（在项目根目录执行）: python -m IMGProcess.WindRecognizer [--labels Data/json/wind_labels.json]
+    import argparse
+    import json
+    from Config import profile
+    parser = argparse.ArgumentParser(description="离线生成风字模板")
+    parser.add_argument("--labels", default=None, help="人工标注文件，缺省时使用 PaddleOCR 标注")
+    args = parser.parse_args()
+    labels = None
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+    build_templates(profile['PATH']['TestPath'], profile['PATH']['WindTemplatePath'],
+                    labels, profile['WindRecognizer']['MatchScore'])
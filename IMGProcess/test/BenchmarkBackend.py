@@ -0,0 +1,52 @@
+import os
+import time
+import cv2
+import numpy as np
+from IMGProcess.Classify import Classify, InferenceConfig, classes
+
+# 用法（在项目根目录执行）: python -m IMGProcess.test.BenchmarkBackend
+DATASET_PATH = "Data/recogition/data0"
+REPEAT = 50
+
+# 数据集目录名 → 牌名（s5m 等为红宝牌）
+LABEL_ALIAS = {"s5m": "0m", "s5p": "0p", "s5s": "0s"}
+
+def load_dataset(folder:str)-> tuple[list[np.ndarray], list[str]]:
+    """读取按牌名分目录存放的样本"""
+    images, labels = [], []
+    for label in sorted(os.listdir(folder)):
+        label_dir = os.path.join(folder, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for file in sorted(os.listdir(label_dir)):
+            img = cv2.imread(os.path.join(label_dir, file))
+            if img is not None:
+                images.append(img)
+                labels.append(LABEL_ALIAS.get(label, label))
+    return images, labels
+
+def benchmark(name:str, cfg:dict, images:list[np.ndarray], labels:list[str])-> None:
+    """测量单批次延迟与准确率"""
+    try:
+        classifier = Classify(cfg)
+    except Exception as e:
+        print(f"{name:<22} 跳过: {e}")
+        return
+    batch = images[:140]  # 约等于一帧的牌数
+    classifier.classify_batch(batch)  # 预热
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        classifier.classify_batch(batch)
+    latency = (time.perf_counter() - start) / REPEAT * 1000
+
+    predictions = classifier.classify_batch(images)
+    accuracy = sum(p.label == label for p, label in zip(predictions, labels)) / len(labels)
+    print(f"{name:<22} 批大小 {len(batch):>3} | 延迟 {latency:7.2f} ms | 准确率 {accuracy:.2%}")
+
+if __name__ == '__main__':
+    images, labels = load_dataset(DATASET_PATH)
+    print(f"样本数: {len(images)} | 类别数: {len(set(labels))}/{len(classes)}")
+    for backend in ("torch", "torchscript", "onnx"):
+        for quantize in (False, True):
+            cfg = dict(InferenceConfig, Backend=backend, Quantize=quantize)
+            benchmark(f"{backend}{' + int8' if quantize else ''}", cfg, images, labels)
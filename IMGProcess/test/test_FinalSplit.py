@@ -0,0 +1,30 @@
+import cv2
+import pytest
+from IMGProcess.Geometry import get_geometry
+from IMGProcess.FirstSplit import find_all_cards_in_region
+from IMGProcess.Split import crop_regions
+from IMGProcess.FinalSplit import split_hand, get_tile_boxes, crop_boxes
+
+# 用法（在项目根目录执行）: python -m pytest IMGProcess/test
+
+SIZE_TOLERANCE = 2  # 列投影切分与轮廓检测的牌尺寸最大偏差（像素）
+
+def hand_crop(path:str):
+    """按实际流水线裁剪手牌区域：区域定位 → 区域裁剪"""
+    img = cv2.imread(path)
+    h, w = img.shape[:2]
+    regions = find_all_cards_in_region(img, get_geometry(w, h))
+    return crop_regions(img, {"Hand_Tiles": regions["Hand_Tiles"]})["Hand_Tiles"]
+
+@pytest.mark.parametrize("name", ["pc1", "pc2", "pc3"])
+def test_split_hand_matches_contour_crops(name):
+    """列投影切分的张数与牌尺寸应与轮廓检测一致"""
+    crop = hand_crop(f"Data/recogition/IMG/PC/{name}.png")
+    expected = crop_boxes(crop, get_tile_boxes(crop, "Hand_Tiles"))
+    tiles = split_hand(crop)
+
+    assert tiles is not None
+    assert len(tiles) == len(expected)
+    for tile, reference in zip(tiles, expected):
+        assert abs(tile.shape[0] - reference.shape[0]) <= SIZE_TOLERANCE
+        assert abs(tile.shape[1] - reference.shape[1]) <= SIZE_TOLERANCE
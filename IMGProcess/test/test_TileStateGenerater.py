@@ -0,0 +1,23 @@
+from IMGProcess.Prediction import TilePrediction
+from IMGProcess.TileStateGenerater import GameStateGenerator
+
+# 用法（在项目根目录执行）: python -m pytest IMGProcess/test
+
+def prediction(label:str, confidence:float, alternative:str, alternative_prob:float)-> TilePrediction:
+    return TilePrediction(label, confidence, ((label, confidence), (alternative, alternative_prob)))
+
+def test_reconcile_keeps_swapped_tile_above_reject_threshold():
+    """5 张 1m 超限，最低置信度那张换成概率仅 0.1 的次优候选后仍应保留在手牌中"""
+    generator = GameStateGenerator()
+    hand = [prediction("1m", confidence, "2m", 0.1) for confidence in (0.9, 0.85, 0.8, 0.75, 0.7)]
+    hand += [prediction(tile, 0.95, "9z", 0.01) for tile in ("3p", "4p", "5p", "6s", "7s", "8s", "1z", "1z")]
+    predictions = {"Hand_Tiles": hand}
+
+    assert generator.reconcile_tile_counts(predictions)
+    swapped = predictions["Hand_Tiles"][4]
+    assert swapped.label == "2m" and swapped.reconciled
+    assert swapped.confidence == 0.7
+
+    tiles = generator.process_tiles(predictions)["Hand_Tiles"]
+    assert len(tiles) == 13
+    assert tiles.count("1m") == 4 and tiles.count("2m") == 1
@@ -1,23 +1,25 @@
 import os
 import cv2
-import json
 import numpy as np
 from concurrent.futures import ThreadPoolExecutor
-from functools import lru_cache, partial
+from functools import partial
 from IMGProcess import *
 from IMGProcess.TileStateGenerater import GameStateGenerator
-from IMGProcess.DrawPic import safe_rect
 from IMGProcess.FirstSplit import find_all_cards_in_region
-from IMGProcess.FinalSplit import process_folder
+from IMGProcess.FinalSplit import split_regions, save_tiles
 from IMGProcess.ActorDetector import detect_actor
-from IMGProcess.Split import save_cropped_regions
-import paddleocr
-import threading
+from IMGProcess.Split import crop_regions, save_cropped_regions
+from IMGProcess.Frame import Frame
+from IMGProcess.Geometry import RegionGeometry, get_geometry
+from IMGProcess.PondTracker import DISCARD_KEYS
+from IMGProcess.ChangeDetector import RegionChangeDetector
+from IMGProcess.WindCache import WindCache
+from IMGProcess.WindRecognizer import WindGlyphRecognizer, OcrReader
+import Shanten
 
 
 # 预加载配置数据
-with open("Data/json/profile.json", "r", encoding="utf-8") as f:
-    profile = json.load(f)
+from Config import profile
 
 # 初始化全局配置（线程安全）
 PATH_CONFIG = {
@@ -28,16 +30,6 @@ PATH_CONFIG = {
     'game_state_path': profile['PATH']['BoardStatePath']
 }
 
-REGION_CONFIG = {
-    'phone': (profile['Regions_Phone'], profile['Yellow_Light_Regions_Phone']),
-    'pc': (profile['Regions_PC'], profile['Yellow_Light_Regions_PC'])
-}
-
-# 预加载OCR模型（假设recognize_word使用PaddleOCR）
-@lru_cache(maxsize=None)
-def init_ocr():
-    return paddleocr.PaddleOCR(use_angle_cls=True, lang="ch", show_log=False)
-
 # OpenCV优化配置
 cv2.setNumThreads(4)
 
@@ -61,92 +53,67 @@ class ImageProcessor:
     """图像处理流水线"""
     def __init__(self):
         self.is_phone = None
+        self.geometry = None  # 当前分辨率的区域几何信息（按分辨率缓存）
         self.regions, self.yellow_regions = None, None
-        self.ocr = init_ocr()  # 单例初始化
-        self._ocr_lock = threading.Lock()  # 多线程互斥锁
-        self._ocr_warmed_up = False
+        self.wind_recognizer = WindGlyphRecognizer(profile['PATH']['WindTemplatePath'])
+        self.ocr_reader = None
         self.GameState = None
-
-    def _warm_up_ocr(self):
-        """只预热一次"""
-        if not self._ocr_warmed_up:
-            try:
-                dummy_img = np.random.randint(0, 255, (64,64,3), dtype=np.uint8)
-                with self._ocr_lock:
-                    self.ocr.ocr(dummy_img)
-                self._ocr_warmed_up = True
-                print("🔥 OCR预热完成")
-            except Exception as e:
-                print(f"🔥 OCR预热失败: {str(e)}")
+        self.generator = GameStateGenerator()  # 常驻生成器，分类模型只加载一次
+        self.executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="ImageProcessor")  # 常驻线程池，避免每帧创建线程
+        self._apply_config(profile)
+        profile.subscribe(self._apply_config)
+
+    def _apply_config(self, config)-> None:
+        """读取可热重载的参数（区域变化检测、风字识别、调试输出），配置变化后所有区域重新识别"""
+        # 区域变化检测：未变化的区域沿用上次的识别结果
+        self.change_config = config['ChangeDetect']
+        self.change_detector = RegionChangeDetector(self.change_config['GridSize'], self.change_config['Threshold'])
+        # 风字识别：模板匹配为主，PaddleOCR 仅作可选兜底（已加载的 OCR 模型在重新启用时复用）
+        wind_config = config['WindRecognizer']
+        self.wind_recognizer.match_score = wind_config['MatchScore']
+        self.ocr_reader = (self.ocr_reader or OcrReader()) if wind_config['OcrFallback'] else None
+        self.wind_cache = WindCache()  # 风牌一局内基本不变，按 ROI 哈希缓存识别结果（配置变化后清空）
+        # 调试输出：将区域裁剪和单牌切分结果写入 split_first/ 与 split_final/
+        self.debug_split_dump = config.get('DebugSplitDump', False)
+
+    def warm_up(self)-> None:
+        """预加载分类模型、向听查表与 OCR（可在后台线程中调用，首帧无需再等待模型加载）"""
+        self.generator.classifier
+        if profile['Shanten']['Enabled']:
+            Shanten.get_table()
+        if self.ocr_reader:
+            self.ocr_reader.warm_up()
 
     def recognize_word(self, roi: np.ndarray) -> list:
-        """OCR识别，线程安全"""
-        if roi is None or roi.size == 0:
-            print("🆑 空输入数据")
-            return []
-
-        if not roi.flags['C_CONTIGUOUS']:
-            roi = np.ascontiguousarray(roi)
-        if roi.dtype != np.uint8:
-            roi = roi.astype(np.uint8)
-        if len(roi.shape) == 2:
-            roi = cv2.cvtColor(roi, cv2.COLOR_GRAY2RGB)
-        elif roi.shape[2] == 4:
-            roi = cv2.cvtColor(roi, cv2.COLOR_BGRA2RGB)
-        else:
-            roi = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)
-
-        if roi.shape[0] < 5 or roi.shape[1] < 5:
-            print(f"📏 忽略过小区域: {roi.shape}")
-            return []
-
-        # 模型预热（只执行一次）
-        self._warm_up_ocr()
-
-        try:
-            with self._ocr_lock:
-                results = self.ocr.ocr(roi, det=False, cls=True)
-        except Exception as e:
-            print(f"❌ OCR异常: {str(e)}")
-            return []
-
-        recognized_texts = []
-        for res in results:
-            if isinstance(res, list):
-                for line in res:
-                    if isinstance(line, tuple) and len(line) == 2 and isinstance(line[0], str):
-                        recognized_texts.append(line[0])
-                    else:
-                        print(f"⚠️ Unexpected OCR result structure: {line}")
-
-        return recognized_texts if recognized_texts else ""
+        """OCR识别（兜底），线程安全"""
+        return self.ocr_reader.recognize(roi) if self.ocr_reader else []
         
-    def process(self, img_path:str)-> bool:
-        """处理单个图像的全流程"""
+    def process(self, frame:Frame)-> bool:
+        """处理单帧图像的全流程"""
         try:
-            # 阶段1：图像读取和基础处理
-            img = cv2.imread(img_path)
+            # 阶段1：直接使用帧中已解码的图像
+            img = frame.image
             if img is None:
                 return
             
             h, w = img.shape[:2]
-            img_name = os.path.basename(img_path)
+            img_name = f"{frame.name}.png"
             
-            # 阶段2：并行处理独立任务
-            with ThreadPoolExecutor(max_workers=2) as executor:
-                # 字风识别
-                self_wind_future = executor.submit(self._process_wind, img, h, w, "Self_Wind")
-                field_wind_future = executor.submit(self._process_wind, img, h, w, "Field_Wind")
+            # 阶段2：并行处理独立任务（常驻线程池）
+            executor = self.executor
+            # 字风识别
+            self_wind_future = executor.submit(self._process_wind, img, h, w, "Self_Wind")
+            field_wind_future = executor.submit(self._process_wind, img, h, w, "Field_Wind")
 
-                # # 行动人检测
-                # actor_future = executor.submit(detect_actor, img, self.yellow_regions)
+            # # 行动人检测（与区域处理共享整帧 HSV）
+            # actor_future = executor.submit(lambda: detect_actor(img, self.geometry, frame.hsv))
 
-                # 区域处理
-                region_future = executor.submit(find_all_cards_in_region, img, self.regions)
+            # 区域处理：整帧只做一次 HSV 转换
+            region_future = executor.submit(lambda: find_all_cards_in_region(img, self.geometry, frame.hsv))
 
-                # is_actor, yellow = actor_future.result()
-                hand_regions = region_future.result()
-                text_self_wind, text_field_wind = self_wind_future.result(), field_wind_future.result()
+            # is_actor, yellow = actor_future.result()
+            hand_regions = region_future.result()
+            text_self_wind, text_field_wind = self_wind_future.result(), field_wind_future.result()
  
             # 阶段3：顺序处理依赖任务
             print(text_self_wind,text_field_wind)
@@ -155,12 +122,15 @@ class ImageProcessor:
             return game_state_useful
 
         except Exception as e:
-            print(f"处理 {img_path} 失败: {str(e)}")
+            # 识别中断时缓存可能与参考图不一致，下一帧全部重新识别
+            self.change_detector.reset()
+            self.generator.pond_tracker.reset()
+            print(f"处理 {frame.name} 失败: {str(e)}")
 
     def _process_wind(self, img, h, w, wind_type): 
         """风牌识别专用方法（增强校验）"""
-        # 获取安全区域
-        Wind = safe_rect(self.regions[wind_type]['rect'], h, w)
+        # 获取安全区域（预先换算的像素矩形）
+        Wind = self.geometry.rects[wind_type]
         
         # 严格校验坐标有效性
         x1, y1, x2, y2 = Wind
@@ -169,9 +139,20 @@ class ImageProcessor:
             return []
             
         # 提取ROI并复制数据（解决内存对齐问题）
-        roi = img[y1:y2, x1:x2].copy()  # 使用copy()避免视图问题
+        roi = self.geometry.view(img, wind_type).copy()  # 使用copy()避免视图问题
+
+        # ROI 未变化时直接返回上次结果
+        roi_hash, cached = self.wind_cache.lookup(wind_type, roi)
+        if cached is not None:
+            return cached
+
+        # 先用风字模板识别（模板离线生成，运行时只读），无法识别时回退到 OCR
+        texts = self.wind_recognizer.recognize(wind_type, roi)
+        if texts is None:
+            texts = self.recognize_word(roi)
+        self.wind_cache.store(wind_type, roi_hash, texts)
         
-        return self.recognize_word(roi)
+        return texts
     
     def _save_and_generate(self, 
                            img:np.ndarray, 
@@ -179,47 +160,56 @@ class ImageProcessor:
                            img_name:str, 
                            text_self_wind:list, 
                            text_field_wind:list)-> bool:
-        """保存结果并生成游戏状态"""
-        # 并行保存操作
-        with ThreadPoolExecutor(max_workers=2) as io_executor:
-            # 保存第一次分割结果
-            first_path = io_executor.submit(
-                save_cropped_regions,
-                img, regions, img_name, PATH_CONFIG['first_processed']
-            ).result()
-            
-            # 保存第二次分割结果
-            io_executor.submit(
-                process_folder, first_path, PATH_CONFIG['second_processed']
-            )
+        """内存中切分并生成游戏状态"""
+        # 只对发生变化的区域重新切分和识别
+        keys = [key for key in self.regions if key not in ('Self_Wind', 'Field_Wind')]
+        if self.change_config['Enabled']:
+            changed = self.change_detector.detect(img, self.geometry.rects, keys)
+            regions = {key: rect for key, rect in regions.items() if key in changed}
+        else:
+            changed = set(keys)
+        reuse = set(keys) - changed
+
+        # 第一次分割：区域裁剪（视图）；第二次分割：提取单张牌（牌河按出牌顺序增量跟踪）
+        crops = crop_regions(img, regions)
+        pond_crops = {key: crops.pop(key) for key in DISCARD_KEYS if key in crops}
+        region_tiles = split_regions(crops)
+        region_tiles.update(self.generator.pond_tracker.split(pond_crops))
+
+        # 调试输出（可选）
+        if self.debug_split_dump:
+            with ThreadPoolExecutor(max_workers=2) as io_executor:
+                io_executor.submit(save_cropped_regions, img, regions, img_name, PATH_CONFIG['first_processed'])
+                io_executor.submit(save_tiles, region_tiles, img_name, PATH_CONFIG['second_processed'])
         
         # 生成游戏状态
         print(f"生成游戏状态: {os.path.splitext(img_name)[0]}")
-        generator = GameStateGenerator(WindCoding(text_self_wind[0]), 
-                                       WindCoding(text_field_wind[0]), 
-                                       self.GameState)
-        print("Generator初始化完成")
-        generator.find_subfolders_with_suffix_scandir(os.path.splitext(img_name)[0])
+        # 模板与 OCR 均未识别时风牌未知（未启用 OCR 兜底时结果为空列表）
+        self.generator.update_context(WindCoding(text_self_wind[0]) if text_self_wind else None,
+                                      WindCoding(text_field_wind[0]) if text_field_wind else None,
+                                      self.GameState)
+        self.generator.set_region_tiles(region_tiles, reuse)
 
-        game_state_useful = generator.save_board_state(PATH_CONFIG['game_state_path'])
+        game_state_useful = self.generator.save_board_state(PATH_CONFIG['game_state_path'])
 
         return game_state_useful
 
-    def update(self, is_phone:bool, GameState:str)-> None:
-        """更新配置"""
-        self.is_phone = is_phone
-        self.regions, self.yellow_regions = REGION_CONFIG['phone' if is_phone else 'pc']
+    def update(self, geometry:RegionGeometry, GameState:str)-> None:
+        """更新配置（区域几何信息按分辨率缓存，配置热重载后自动重建）"""
+        self.geometry = geometry
+        self.is_phone = geometry.is_phone
+        self.regions, self.yellow_regions = geometry.regions, geometry.yellow_regions
         self.GameState = GameState
 
-def ImageDetection(filePath:str, ImageProcessor:ImageProcessor, GameState:str)-> bool:
-    """单图片处理优化"""
-    img = cv2.imread(filePath)
+def ImageDetection(frame:Frame, ImageProcessor:ImageProcessor, GameState:str)-> bool:
+    """单帧处理优化"""
+    img = frame.image
     if img is None:
-        print(f"⚠️ 无法读取图像: {filePath}")
+        print(f"⚠️ 无效帧: {frame.name}")
         return
     h, w = img.shape[:2]
     
-    ImageProcessor.update(max(w, h)/min(w, h) > 2, GameState)
-    game_state_useful = ImageProcessor.process(filePath)
+    ImageProcessor.update(get_geometry(w, h), GameState)
+    game_state_useful = ImageProcessor.process(frame)
 
     return game_state_useful
\ No newline at end of file
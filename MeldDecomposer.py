@@ -0,0 +1,120 @@
+import numpy as np
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+import TileCodec
+
+# 面子类型，与动作 operation.type 编号一致
+CHI = 2   # 顺子
+PON = 3   # 刻子
+KAN = 5   # 杠（明杠 / 加杠，四张可见）
+
+MELD_SIZES = {CHI: 3, PON: 3, KAN: 4}
+
+class Meld(NamedTuple):
+    """一组面子：类型 + 起始牌种（34 编号，顺子为最小的一张）"""
+    type: int
+    kind: int
+
+    def kinds(self)-> Tuple[int, ...]:
+        if self.type == CHI:
+            return (self.kind, self.kind + 1, self.kind + 2)
+        return (self.kind,) * MELD_SIZES[self.type]
+
+    def contains(self, kind:int)-> bool:
+        return kind in self.kinds()
+
+Partition = Tuple[Meld, ...]
+
+def _can_chi(counts:Tuple[int, ...], k:int)-> bool:
+    """数牌 1-7 开头且后两张都在"""
+    return k < 27 and k % 9 <= 6 and counts[k+1] > 0 and counts[k+2] > 0
+
+@lru_cache(maxsize=4096)
+def _decompose(counts:Tuple[int, ...])-> Tuple[Partition, ...]:
+    """
+    穷举 34 计数向量的全部面子划分（以计数元组为键记忆化）
+    每次只处理最小的非零牌种，它必然是某个杠 / 刻子 / 顺子的起点，因此不会漏解
+    """
+    k = next((i for i, c in enumerate(counts) if c), None)
+    if k is None:
+        return ((),)
+    partitions = []
+    options = []
+    if counts[k] >= 4:
+        options.append((Meld(KAN, k), (k,) * 4))
+    if counts[k] >= 3:
+        options.append((Meld(PON, k), (k,) * 3))
+    if _can_chi(counts, k):
+        options.append((Meld(CHI, k), (k, k + 1, k + 2)))
+    for meld, used in options:
+        rest = list(counts)
+        for i in used:
+            rest[i] -= 1
+        partitions.extend((meld,) + tail for tail in _decompose(tuple(rest)))
+    # 同一组面子的不同排列只保留一次（如 333345 先取刻子或先取顺子结果相同）
+    return tuple(dict.fromkeys(tuple(sorted(p)) for p in partitions))
+
+def decompose(counts34:np.ndarray)-> Tuple[Partition, ...]:
+    """34 计数向量的全部面子划分，无法完整划分时返回空元组"""
+    return _decompose(tuple(counts34.tolist()))
+
+def decompose_tiles(tiles:List[str])-> Tuple[Partition, ...]:
+    return decompose(TileCodec.kind_counts(tiles))
+
+def is_consistent(partition:Partition, prev:Partition)-> bool:
+    """
+    当前划分是否延续上一帧的划分：上一帧的面子都还在（副露不会消失），
+    其中刻子可以变为同种的杠（加杠）
+    """
+    remaining = list(partition)
+    for meld in prev:
+        if meld in remaining:
+            remaining.remove(meld)
+        elif meld.type == PON and Meld(KAN, meld.kind) in remaining:
+            remaining.remove(Meld(KAN, meld.kind))
+        else:
+            return False
+    return True
+
+def new_melds(partition:Partition, prev:Partition)-> List[Meld]:
+    """当前划分相对上一帧新增的面子（加杠不计入，由加杠检测单独处理）"""
+    remaining = list(partition)
+    for meld in prev:
+        if meld in remaining:
+            remaining.remove(meld)
+        elif meld.type == PON and Meld(KAN, meld.kind) in remaining:
+            remaining.remove(Meld(KAN, meld.kind))
+    return remaining
+
+def choose_partition(partitions:Tuple[Partition, ...], prev:Partition,
+                     called_kind:Optional[int]=None)-> Optional[Partition]:
+    """
+    从全部划分中选出与上一帧划分一致、且新增面子包含被鸣的那张牌的划分；
+    依次退而求其次，新增面子越少越优先，同等条件下取枚举顺序靠前者（杠 > 刻 > 顺）
+    """
+    if not partitions:
+        return None
+    consistent = [p for p in partitions if is_consistent(p, prev)] or list(partitions)
+    if called_kind is not None:
+        matched = [p for p in consistent if any(m.contains(called_kind) for m in new_melds(p, prev))]
+        consistent = matched or consistent
+    return min(consistent, key=lambda p: len(new_melds(p, prev)))
+
+def meld_tiles(melds:List[Meld], counts37:np.ndarray, preferred:Optional[np.ndarray]=None)-> List[List[str]]:
+    """
+    按划分取出实际牌（含红五），取出的牌从 37 计数向量 counts37 中扣除（原地修改）
+    :param preferred: 优先取牌的 37 计数向量（如本帧新增的牌，使红五归属到新面子），需包含于 counts37，不会被修改
+    """
+    if preferred is None:
+        rest, preferred = counts37, np.zeros_like(counts37)
+    else:
+        rest, preferred = counts37 - preferred, preferred.copy()
+    tiles = []
+    for meld in melds:
+        group = []
+        for k in meld.kinds():
+            group += TileCodec.take(preferred, k, 1) or TileCodec.take(rest, k, 1)
+        tiles.append(group)
+    if rest is not counts37:
+        counts37[:] = rest + preferred
+    return tiles
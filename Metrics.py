@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Optional
+
+def atomic_write_json(path:str, data:dict)-> None:
+    """先写临时文件再原子替换，写入中途崩溃不会破坏原文件"""
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class MatchMetrics:
+    """画面状态匹配得分统计（仅在内存中更新），可选定期写出快照文件"""
+    def __init__(self, snapshot_path:Optional[str]=None, snapshot_interval:float=0):
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval  # 秒，0 表示不写快照
+        self.lock = threading.Lock()
+        self.best_scores = {}         # 最近一帧各状态的最高得分
+        self.state_counts = Counter() # 各匹配状态出现的帧数
+        self.frames = 0
+        self.last_state = None
+        self.last_update = 0.0
+        self._last_snapshot = time.time()
+
+    def record(self, scores:dict, match_state:str)-> None:
+        """记录一帧的匹配结果"""
+        with self.lock:
+            self.best_scores = dict(scores)
+            self.state_counts[match_state] += 1
+            self.frames += 1
+            self.last_state = match_state
+            self.last_update = time.time()
+            due = (self.snapshot_path and self.snapshot_interval > 0
+                   and self.last_update - self._last_snapshot >= self.snapshot_interval)
+            if due:
+                self._last_snapshot = self.last_update
+        if due:
+            self.write_snapshot()
+
+    def snapshot(self)-> dict:
+        """当前统计的副本"""
+        with self.lock:
+            return {
+                "BestMatchState": dict(self.best_scores),
+                "StateCounts": dict(self.state_counts),
+                "Frames": self.frames,
+                "LastState": self.last_state,
+                "LastUpdate": self.last_update,
+            }
+
+    def write_snapshot(self)-> None:
+        """原子写出快照文件"""
+        try:
+            atomic_write_json(self.snapshot_path, self.snapshot())
+        except Exception as e:
+            print(f"⚠️ 写入匹配统计快照失败: {e}")
+
+
+class StartupTimer:
+    """启动耗时统计：记录各导入/初始化阶段的耗时并输出分解报告"""
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = []  # [(阶段名, 秒)]
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name:str):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.stages.append((name, time.perf_counter() - begin))
+
+    def report(self)-> str:
+        """按耗时降序输出各阶段耗时"""
+        with self.lock:
+            stages = sorted(self.stages, key=lambda x: -x[1])
+        total = time.perf_counter() - self.start
+        lines = [f"⏱️ 启动耗时 {total:.2f}s"]
+        lines += [f"   {name:<24} {seconds:6.2f}s" for name, seconds in stages]
+        report = "\n".join(lines)
+        print(report)
+        return report
@@ -0,0 +1,345 @@
+import os
+import argparse
+import threading
+import numpy as np
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import TileCodec
+
+# 单门花色（9 种数牌）的查表：键为 5 进制编码的计数，值为 [有无雀头][面子数] -> 最多搭子数
+# 面子、搭子数超过 4 对向听无意义，统一截断到 4，表中每项 1 字节
+MAX_GROUPS = 4
+INFEASIBLE = 255
+SUIT_SIZE = 9
+MAX_SUIT_TILES = 14
+DEFAULT_TABLE_PATH = "Data/shanten/suit_table.npz"
+
+# 幺九牌（国士无双）
+TERMINALS = (0, 8, 9, 17, 18, 26, 27, 28, 29, 30, 31, 32, 33)
+
+Vector = Tuple[int, ...]   # 长度 10：索引 雀头*5 + 面子数，值为最多搭子数，-1 表示不可达
+
+_EMPTY = tuple([0] + [-1] * (2 * (MAX_GROUPS + 1) - 1))
+
+def suit_key(counts:Tuple[int, ...])-> int:
+    """单门计数 -> 5 进制键"""
+    key = 0
+    for c in counts:
+        key = key * 5 + c
+    return key
+
+def _merge(a:Vector, b:Vector)-> Vector:
+    return tuple(max(x, y) for x, y in zip(a, b))
+
+def _shift(v:Vector, meld:int=0, taatsu:int=0, pair:int=0)-> Vector:
+    """在划分中加入一个面子 / 搭子 / 雀头"""
+    out = [-1] * len(v)
+    for p in range(2 - pair):
+        for m in range(MAX_GROUPS + 1 - meld):
+            t = v[p * 5 + m]
+            if t >= 0:
+                i = (p + pair) * 5 + m + meld
+                out[i] = max(out[i], min(t + taatsu, MAX_GROUPS))
+    return tuple(out)
+
+def _vector(counts:Tuple[int, ...], sequences:bool, memo:Dict)-> Vector:
+    """
+    穷举一门牌的全部拆法（面子 / 搭子 / 雀头 / 孤张），记忆化
+    只处理最小的非零牌：它要么是孤张，要么是某个以它为起点的组合
+    """
+    v = memo.get(counts)
+    if v is not None:
+        return v
+    i = next((k for k, c in enumerate(counts) if c), None)
+    if i is None:
+        return _EMPTY
+    def rest(*used):
+        r = list(counts)
+        for k in used:
+            r[k] -= 1
+        return _vector(tuple(r), sequences, memo)
+    v = rest(i)  # 孤张
+    n = len(counts)
+    if counts[i] >= 3:
+        v = _merge(v, _shift(rest(i, i, i), meld=1))
+    if counts[i] >= 2:
+        v = _merge(v, _shift(rest(i, i), pair=1))
+        v = _merge(v, _shift(rest(i, i), taatsu=1))
+    if sequences:
+        if i + 2 < n and counts[i+1] and counts[i+2]:
+            v = _merge(v, _shift(rest(i, i + 1, i + 2), meld=1))
+        if i + 1 < n and counts[i+1]:
+            v = _merge(v, _shift(rest(i, i + 1), taatsu=1))
+        if i + 2 < n and counts[i+2]:
+            v = _merge(v, _shift(rest(i, i + 2), taatsu=1))
+    memo[counts] = v
+    return v
+
+def _suit_configs(total:int=MAX_SUIT_TILES):
+    """每种最多 4 张、合计不超过 total 张的全部单门计数"""
+    def walk(prefix, remaining):
+        if len(prefix) == SUIT_SIZE:
+            yield tuple(prefix)
+            return
+        for c in range(min(4, remaining) + 1):
+            yield from walk(prefix + [c], remaining - c)
+    return walk([], total)
+
+def build_suit_table(path:str=DEFAULT_TABLE_PATH)-> str:
+    """离线生成单门查表：按键排序的键数组 + 对应的 (N, 2, 5) uint8 值数组"""
+    memo = {}
+    configs = list(_suit_configs())
+    keys = np.fromiter((suit_key(c) for c in configs), dtype=np.int32, count=len(configs))
+    values = np.empty((len(configs), 2 * (MAX_GROUPS + 1)), dtype=np.uint8)
+    for row, counts in enumerate(configs):
+        values[row] = [INFEASIBLE if t < 0 else t for t in _vector(counts, True, memo)]
+    order = np.argsort(keys)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(path, keys=keys[order], values=values[order].reshape(-1, 2, MAX_GROUPS + 1))
+    print(f"📦 向听查表已生成: {path} ({len(configs)} 项)")
+    return path
+
+class SuitTable:
+    """单门查表（只读数组，二分查找）"""
+    def __init__(self, path:str):
+        with np.load(path) as data:
+            self.keys = data["keys"].astype(np.int64)  # 与 Python int 同类型，查找时不触发整表类型转换
+            values = data["values"].reshape(len(self.keys), -1)
+        self.values = np.where(values == INFEASIBLE, -1, values).astype(np.int8)
+
+    def lookup(self, counts:List[int])-> Vector:
+        """单门 9 种计数（Python int 序列）-> 长度 10 的最多搭子数"""
+        row = int(np.searchsorted(self.keys, suit_key(counts)))
+        return tuple(self.values[row].tolist())
+
+_table = None
+_table_lock = threading.Lock()
+
+def get_table(path:Optional[str]=None)-> SuitTable:
+    """进程内共享的查表（离线生成，随仓库提供；运行时不生成，避免首帧卡顿约 20 秒）"""
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                if path is None:
+                    from Config import profile
+                    path = profile['Shanten']['TablePath']
+                if not os.path.exists(path):
+                    raise FileNotFoundError(f"向听查表不存在: {path}，请先在项目根目录执行 python Shanten.py --output {path}")
+                _table = SuitTable(path)
+    return _table
+
+@lru_cache(maxsize=None)
+def _honor_vector(counts:Tuple[int, ...])-> Vector:
+    """字牌没有顺子与两面搭子，拆法很少，直接穷举"""
+    return _vector(counts, False, {})
+
+def _combine(a:Vector, b:Vector)-> Vector:
+    """两门牌的 (雀头, 面子数) -> 最多搭子数 做 max-plus 合并（纯 Python，小数组比 numpy 快）"""
+    out = [-1] * len(a)
+    for pa in range(2):
+        for ma in range(MAX_GROUPS + 1):
+            ta = a[pa * 5 + ma]
+            if ta < 0:
+                continue
+            for pb in range(2 - pa):
+                for mb in range(MAX_GROUPS + 1 - ma):
+                    tb = b[pb * 5 + mb]
+                    i = (pa + pb) * 5 + ma + mb
+                    if tb >= 0 and out[i] < ta + tb:
+                        out[i] = ta + tb
+    return tuple(out)
+
+def _others(vectors:List[Vector])-> List[Vector]:
+    """每一门之外其余三门的合并结果：摸 / 打一张只改变一门，与之合并一次即可"""
+    others = []
+    for i in range(len(vectors)):
+        total = _EMPTY
+        for j, v in enumerate(vectors):
+            if j != i:
+                total = _combine(total, v)
+        others.append(total)
+    return others
+
+def _groups_shanten(total:Vector, called:int)-> int:
+    """一般形向听：8 - 2×面子 - 搭子 - 雀头，面子 + 搭子不超过还需的面子数"""
+    need = MAX_GROUPS - called
+    best = 8
+    for p in range(2):
+        for m in range(MAX_GROUPS + 1):
+            t = total[p * 5 + m]
+            if t < 0:
+                continue
+            m_used = min(m, need)
+            best = min(best, 2 * (need - m_used) - min(t, need - m_used) - p)
+    return best
+
+@lru_cache(maxsize=4096)
+def _entries(v:Vector)-> Tuple[Tuple[int, int, int], ...]:
+    """拆分结果中可达的 (雀头, 面子数, 最多搭子数)"""
+    return tuple((i // 5, i % 5, t) for i, t in enumerate(v) if t >= 0)
+
+def _merged_shanten(a:Vector, b:Vector, called:int)-> int:
+    """与 _groups_shanten(_combine(a, b)) 相同，但不构造合并向量，只遍历两边可达的组合"""
+    need = MAX_GROUPS - called
+    best = 8
+    b_entries = _entries(b)
+    for pa, ma, ta in _entries(a):
+        for pb, mb, tb in b_entries:
+            if pa + pb > 1 or ma + mb > MAX_GROUPS:
+                continue
+            m = min(ma + mb, need)
+            s = 2 * (need - m) - min(ta + tb, need - m) - pa - pb
+            if s < best:
+                best = s
+    return best
+
+def _regular_shanten(vectors:List[Vector], called:int)-> int:
+    total = vectors[0]
+    for v in vectors[1:]:
+        total = _combine(total, v)
+    return _groups_shanten(total, called)
+
+def _connected(counts:List[int], k:int)-> bool:
+    """
+    摸到 k 能否与已有的牌组成面子 / 搭子 / 雀头：不能时它只是孤张，一般形拆分结果不变
+    数牌看同门前后两张以内，字牌只看同种
+    """
+    if k >= 27:
+        return counts[k] > 0
+    base = k - k % 9
+    return any(counts[max(base, k - 2):min(base + 9, k + 3)])
+
+_TERMINAL_SET = frozenset(TERMINALS)
+
+class _SpecialForms:
+    """七对子与国士无双的向听数，摸 / 打一张后按计数增量计算"""
+    def __init__(self, counts:List[int]):
+        self.counts = counts
+        self.pairs = sum(c >= 2 for c in counts)
+        self.kinds = sum(c > 0 for c in counts)
+        self.terminals = sum(counts[k] > 0 for k in TERMINALS)
+        self.terminal_pairs = sum(counts[k] >= 2 for k in TERMINALS)
+
+    @staticmethod
+    def _shanten(pairs:int, kinds:int, terminals:int, terminal_pairs:int)-> int:
+        chiitoitsu = 6 - pairs + max(0, 7 - kinds)
+        kokushi = 13 - terminals - (1 if terminal_pairs else 0)
+        return min(chiitoitsu, kokushi)
+
+    def shanten(self)-> int:
+        return self._shanten(self.pairs, self.kinds, self.terminals, self.terminal_pairs)
+
+    def after_draw(self, k:int)-> int:
+        c, terminal = self.counts[k], k in _TERMINAL_SET
+        return self._shanten(self.pairs + (c == 1), self.kinds + (c == 0),
+                             self.terminals + (terminal and c == 0), self.terminal_pairs + (terminal and c == 1))
+
+    def after_discard(self, k:int)-> int:
+        c, terminal = self.counts[k], k in _TERMINAL_SET
+        return self._shanten(self.pairs - (c == 2), self.kinds - (c == 1),
+                             self.terminals - (terminal and c == 1), self.terminal_pairs - (terminal and c == 2))
+
+class HandEvaluator:
+    """
+    手牌向听数与有效牌计算：三门数牌查表、字牌现场穷举，四门结果合并
+    计数向量按 34 牌种（红五计为普通五）；摸 / 打一张时只重查该门，与其余三门的预合并结果合并
+    """
+    def __init__(self, table:Optional[SuitTable]=None):
+        self.table = table or get_table()
+
+    def _suit_vector(self, counts:List[int], suit:int)-> Vector:
+        """第 suit 门（0-2 万筒条，3 字牌）的拆分结果"""
+        if suit < 3:
+            return self.table.lookup(counts[suit * 9:(suit + 1) * 9])
+        return _honor_vector(tuple(counts[27:]))
+
+    def _vectors(self, counts:List[int])-> List[Vector]:
+        return [self._suit_vector(counts, suit) for suit in range(4)]
+
+    def shanten(self, counts34:np.ndarray, called:int=0)-> int:
+        """向听数（-1 为和牌），副露时只计一般形"""
+        counts = counts34.tolist()
+        result = _regular_shanten(self._vectors(counts), called)
+        if called == 0:
+            result = min(result, _SpecialForms(counts).shanten())
+        return result
+
+    def ukeire(self, counts34:np.ndarray, called:int=0, visible:Optional[np.ndarray]=None)-> Tuple[int, Dict[str, int]]:
+        """
+        3n+1 张手牌的向听数与有效牌：摸到后向听数减少的牌种 -> 剩余张数
+        :param visible: 场上已见的 34 计数（不含手牌），用于扣除剩余张数
+        """
+        counts = counts34.tolist()
+        seen = (counts34 + visible).tolist() if visible is not None else counts
+        vectors = self._vectors(counts)
+        others = _others(vectors)
+        regular = _merged_shanten(others[0], vectors[0], called)
+        special = _SpecialForms(counts) if called == 0 else None
+        current = min(regular, special.shanten()) if special else regular
+        effective = {}
+        for k in range(TileCodec.N_KINDS):
+            left = 4 - seen[k]
+            if left <= 0:
+                continue
+            after = regular
+            if _connected(counts, k):
+                suit = min(k // 9, 3)
+                counts[k] += 1
+                after = _merged_shanten(others[suit], self._suit_vector(counts, suit), called)
+                counts[k] -= 1
+            if special:
+                after = min(after, special.after_draw(k))
+            if after < current:
+                effective[TileCodec.decode(k)] = left
+        return current, effective
+
+    def evaluate(self, hand:List[str], visible:Optional[np.ndarray]=None)-> Optional[Dict]:
+        """
+        评估识别出的手牌，副露数由手牌张数推出（13/14 张无副露，10/11 张一副露……）
+        张数为 3 的倍数的手牌不可能出现，多为漏识别或多识别，返回 None
+        """
+        if not 1 <= len(hand) <= 14 or len(hand) % 3 == 0:
+            return None
+        counts34 = TileCodec.kind_counts(hand)
+        if counts34.max() > 4:
+            return None
+        called = (14 - len(hand)) // 3
+        if len(hand) % 3 == 1:
+            shanten, effective = self.ukeire(counts34, called, visible)
+            return {"shanten": shanten, "ukeire": effective, "ukeireCount": sum(effective.values())}
+        # 3n+2 张（刚摸牌）：向听数 + 打出后不增加向听的牌
+        counts = counts34.tolist()
+        vectors = self._vectors(counts)
+        others = _others(vectors)
+        special = _SpecialForms(counts) if called == 0 else None
+        shanten = _merged_shanten(others[0], vectors[0], called)
+        if special:
+            shanten = min(shanten, special.shanten())
+        discards = []
+        for k in np.flatnonzero(counts34).tolist():
+            suit = min(k // 9, 3)
+            counts[k] -= 1
+            after = _merged_shanten(others[suit], self._suit_vector(counts, suit), called)
+            counts[k] += 1
+            if special:
+                after = min(after, special.after_discard(k))
+            if after == shanten:
+                discards.append(TileCodec.decode(k))
+        return {"shanten": shanten, "discards": discards}
+
+_evaluator = None
+
+def get_evaluator()-> HandEvaluator:
+    """进程内共享的手牌评估器（首次使用时加载查表）"""
+    global _evaluator
+    if _evaluator is None:
+        _evaluator = HandEvaluator(get_table())
+    return _evaluator
+
+if __name__ == '__main__':
+    # 用法（在项目根目录执行）: python Shanten.py --output Data/shanten/suit_table.npz
+    parser = argparse.ArgumentParser(description="离线生成向听数单门查表")
+    parser.add_argument("--output", default=DEFAULT_TABLE_PATH)
+    args = parser.parse_args()
+    build_suit_table(args.output)
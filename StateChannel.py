@@ -0,0 +1,120 @@
+import os
+import queue
+import threading
+from multiprocessing.connection import Listener, Client
+from typing import Callable, Iterator, Optional
+
+class StateChannel:
+    """
+    牌局状态发布/订阅通道（进程内）：识别线程发布后立即返回，
+    由分发线程按发布顺序依次回调订阅者
+    """
+    def __init__(self, maxsize:int=64):
+        self.subscribers = []
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def subscribe(self, callback:Callable[[dict], None])-> None:
+        with self.lock:
+            self.subscribers.append(callback)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._dispatch, daemon=True)
+                self.thread.start()
+
+    def unsubscribe(self, callback:Callable[[dict], None])-> None:
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+
+    def publish(self, state:dict)-> None:
+        """发布一帧牌局状态（无订阅者时直接丢弃）"""
+        if not self.subscribers:
+            return
+        try:
+            self.queue.put_nowait(state)
+        except queue.Full:
+            print("⚠️ 状态通道已满，丢弃最早的状态")
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(state)
+
+    def _dispatch(self)-> None:
+        while True:
+            state = self.queue.get()
+            with self.lock:
+                subscribers = list(self.subscribers)
+            for callback in subscribers:
+                try:
+                    callback(state)
+                except Exception as e:
+                    print(f"⚠️ 状态订阅者处理失败: {e}")
+
+# 进程内共享的牌局状态通道：GameStateGenerator 发布，MahjongActionDetector 订阅
+board_channel = StateChannel()
+
+def channel_address(name:str)-> str:
+    """本机通道地址：Windows 命名管道 / Unix 域套接字"""
+    if os.name == "nt":
+        return rf"\\.\pipe\{name}"
+    return os.path.join("/tmp", f"{name}.sock")
+
+class StateServer:
+    """将进程内通道的状态转发给其他进程（识别与动作检测分进程运行时使用）"""
+    def __init__(self, channel:StateChannel, name:str, authkey:bytes):
+        self.address = channel_address(name)
+        if os.name != "nt" and os.path.exists(self.address):
+            os.remove(self.address)  # 清理上次异常退出残留的套接字
+        self.listener = Listener(self.address, authkey=authkey)
+        self.connections = []
+        self.lock = threading.Lock()
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        channel.subscribe(self._forward)
+        print(f"📡 状态通道已启动: {self.address}")
+
+    def _accept_loop(self)-> None:
+        while True:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                return
+            with self.lock:
+                self.connections.append(conn)
+            print("📡 动作检测进程已连接")
+
+    def _forward(self, state:dict)-> None:
+        with self.lock:
+            for conn in list(self.connections):
+                try:
+                    conn.send(state)
+                except (OSError, EOFError):
+                    conn.close()
+                    self.connections.remove(conn)
+
+    def close(self)-> None:
+        self.listener.close()
+        with self.lock:
+            for conn in self.connections:
+                conn.close()
+            self.connections.clear()
+
+def receive_states(name:str, authkey:bytes, retry_interval:float=1.0)-> Iterator[dict]:
+    """连接识别进程的状态通道，逐个产出牌局状态（识别进程未启动时等待重连）"""
+    address = channel_address(name)
+    conn: Optional[object] = None
+    while True:
+        if conn is None:
+            try:
+                conn = Client(address, authkey=authkey)
+                print(f"📡 已连接状态通道: {address}")
+            except OSError:
+                threading.Event().wait(retry_interval)
+                continue
+        try:
+            yield conn.recv()
+        except (OSError, EOFError):
+            print("📡 状态通道断开，等待重连...")
+            conn.close()
+            conn = None
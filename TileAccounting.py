@@ -0,0 +1,130 @@
+import numpy as np
+from typing import Dict, List, Optional
+import TileCodec
+
+# 每个编号的初始张数：普通五 3 张 + 红五 1 张，其余 4 张
+FULL_COUNTS = np.full(TileCodec.N_SLOTS, 4, dtype=np.int64)
+FULL_COUNTS[TileCodec.FOLD[TileCodec.N_KINDS:]] = 3
+FULL_COUNTS[TileCodec.N_KINDS:] = 1
+FULL_COUNTS.flags.writeable = False
+
+class UnseenTiles:
+    """
+    未见牌计数（自己视角）：开局由配牌与宝牌初始化，之后每个动作只扣除新出现的牌，
+    单次更新 O(1)，不必每帧重新统计全部区域
+    - 自己的牌：配牌、摸牌
+    - 他家的牌：弃牌、副露中除被鸣牌以外的牌（加杠只计新增的一张）、暗杠
+    - 宝牌指示牌：随动作附带的 doras 增加时扣除
+    """
+    def __init__(self):
+        self.unseen = FULL_COUNTS.copy()     # 37 编号的未见张数
+        self.total = int(self.unseen.sum())
+        self.exposed = {seat: np.zeros(TileCodec.N_SLOTS, dtype=np.int64) for seat in range(1, 4)}
+        self.doras = []
+        self.conflicts = 0                   # 扣除时已无余牌的次数（多为识别错误）
+
+    def reset(self, hand: Optional[List[str]] = None, doras: Optional[List[str]] = None) -> None:
+        """新一局：恢复全部牌，再扣除配牌与宝牌指示牌"""
+        self.unseen = FULL_COUNTS.copy()
+        self.total = int(self.unseen.sum())
+        for exposed in self.exposed.values():
+            exposed[:] = 0
+        self.doras = []
+        self.conflicts = 0
+        for tile in hand or []:
+            self.see(tile)
+        self.update_doras(doras or [])
+
+    def see(self, tile: str) -> None:
+        """一张牌变为可见"""
+        index = TileCodec.TILE_INDEX.get(tile)
+        if index is None:
+            return
+        if self.unseen[index] > 0:
+            self.unseen[index] -= 1
+            self.total -= 1
+        else:
+            self.conflicts += 1
+
+    def update_doras(self, doras: List[str]) -> None:
+        """宝牌指示牌只增不减（开杠翻新宝牌），新增部分计为可见"""
+        for tile in TileCodec.subtract(doras, self.doras):
+            self.see(tile)
+        self.doras = list(doras)
+
+    def update(self, action: Dict) -> None:
+        """按一个动作（MahjongActionDetector 的输出）扣除新出现的牌"""
+        state = action.get("state")
+        if state == "GameStart":
+            self.reset(action.get("tiles", []), action.get("doras", []))
+            return
+        if state == "GameEnd":
+            self.reset()
+            return
+        if "doras" in action:
+            self.update_doras(action["doras"])
+        if state == "MyAction":
+            self.see(action.get("getTile", ""))
+        elif state == "Discard":
+            self.see(action.get("tile", ""))
+        elif state == "Other_Chipongang":
+            self._see_meld(action)
+        # 自己的副露（MyAction_Chipongang）全部来自手牌或已见的弃牌
+
+    def _see_meld(self, action: Dict) -> None:
+        """
+        他家副露：吃、碰、明杠整组新亮出，被鸣的弃牌此前已计入，扣除其余的牌；
+        加杠只比较该家此前已亮出的牌，新增的只有手中的一张
+        """
+        seat = action.get("seat")
+        exposed = self.exposed.get(seat)
+        if exposed is None:
+            return
+        operation = action.get("operation", {})
+        combination = TileCodec.counts(operation.get("combination", []))
+        op_type = operation.get("type")
+        if op_type == 5 and self._is_added_kan(exposed, combination):
+            new_tiles = np.maximum(combination - exposed, 0)
+            exposed += new_tiles
+        else:
+            new_tiles = combination.copy()
+            exposed += combination
+            # 扣除被鸣的那张弃牌（红五与普通五可互相抵扣）
+            if op_type in (2, 3, 5) and TileCodec.is_tile(action.get("tile", "")):
+                same_kind = np.flatnonzero((TileCodec.FOLD == TileCodec.kind(action["tile"])) & (new_tiles > 0))
+                if len(same_kind):
+                    called = TileCodec.encode(action["tile"])
+                    new_tiles[called if called in same_kind else same_kind[0]] -= 1
+        for tile in TileCodec.expand(new_tiles):
+            self.see(tile)
+
+    @staticmethod
+    def _is_added_kan(exposed: np.ndarray, combination: np.ndarray) -> bool:
+        """杠的牌种此前已有该家的刻子（同种牌只有 4 张，不可能再明杠）"""
+        kinds = np.flatnonzero(TileCodec.fold(combination))
+        return len(kinds) == 1 and TileCodec.fold(exposed)[kinds[0]] >= 3
+
+    def remaining(self, tile: str) -> int:
+        """某种牌的剩余未见张数（红五与普通五合计）"""
+        return int(TileCodec.fold(self.unseen)[TileCodec.kind(tile)])
+
+    def remaining_counts(self) -> np.ndarray:
+        """34 牌种的未见张数"""
+        return TileCodec.fold(self.unseen)
+
+    def probabilities(self) -> np.ndarray:
+        """下一张摸到各牌种的概率（未见牌等概率，包括他家手牌与牌山）"""
+        if self.total <= 0:
+            return np.zeros(TileCodec.N_KINDS)
+        return self.remaining_counts() / self.total
+
+    def snapshot(self) -> Dict:
+        """供下游使用的可序列化结果"""
+        remaining = self.remaining_counts()
+        probabilities = self.probabilities()
+        return {
+            "total": self.total,
+            "remaining": {TileCodec.decode(k): int(remaining[k]) for k in range(TileCodec.N_KINDS)},
+            "probabilities": {TileCodec.decode(k): float(probabilities[k]) for k in range(TileCodec.N_KINDS)},
+            "redFives": {TileCodec.decode(i): int(self.unseen[i]) for i in TileCodec.RED_FIVES},
+        }
@@ -0,0 +1,89 @@
+import numpy as np
+from typing import Iterable, List
+
+# 牌名 <-> 编号，编号与分类模型的输出类别一致（0-33 普通牌，34-36 红宝牌）
+TILE_NAMES = (
+    '1m', '2m', '3m', '4m', '5m', '6m', '7m', '8m', '9m',
+    '1p', '2p', '3p', '4p', '5p', '6p', '7p', '8p', '9p',
+    '1s', '2s', '3s', '4s', '5s', '6s', '7s', '8s', '9s',
+    '1z', '2z', '3z', '4z', '5z', '6z', '7z',
+    '0m', '0p', '0s',
+)
+TILE_INDEX = {name: i for i, name in enumerate(TILE_NAMES)}
+N_KINDS = 34   # 不区分红宝牌的牌种数
+N_SLOTS = 37   # 区分红宝牌的编号数
+SUITS = "mpsz"
+
+# 37 编号 -> 34 牌种（红五折算为普通五）
+FOLD = np.arange(N_SLOTS)
+FOLD[34:] = (4, 13, 22)
+FOLD.flags.writeable = False
+RED_FIVES = (34, 35, 36)
+
+def is_tile(tile: str) -> bool:
+    return tile in TILE_INDEX
+
+def encode(tile: str) -> int:
+    """牌名 -> 37 编号"""
+    try:
+        return TILE_INDEX[tile]
+    except KeyError:
+        raise ValueError(f"Invalid tile: {tile}") from None
+
+def decode(index: int) -> str:
+    return TILE_NAMES[index]
+
+def kind(tile: str) -> int:
+    """牌名 -> 34 牌种编号（红五与普通五相同）"""
+    return int(FOLD[encode(tile)])
+
+def encode_list(tiles: Iterable[str]) -> np.ndarray:
+    """牌名列表 -> 37 编号数组（跳过无法识别的牌名，如牌背）"""
+    return np.fromiter((TILE_INDEX[t] for t in tiles if t in TILE_INDEX), dtype=np.int64)
+
+def counts(tiles: Iterable[str]) -> np.ndarray:
+    """牌名列表 -> 长度 37 的计数向量"""
+    return np.bincount(encode_list(tiles), minlength=N_SLOTS)
+
+def fold(counts37: np.ndarray) -> np.ndarray:
+    """37 计数向量 -> 34 计数向量（红五计入普通五）"""
+    counts34 = counts37[:N_KINDS].copy()
+    counts34[FOLD[N_KINDS:]] += counts37[N_KINDS:]
+    return counts34
+
+def kind_counts(tiles: Iterable[str]) -> np.ndarray:
+    """牌名列表 -> 长度 34 的计数向量"""
+    return fold(counts(tiles))
+
+def expand(counts37: np.ndarray) -> List[str]:
+    """计数向量 -> 牌名列表（按编号排序）"""
+    return [TILE_NAMES[i] for i in np.repeat(np.arange(len(counts37)), counts37).tolist()]
+
+def subtract(curr: List[str], prev: List[str]) -> List[str]:
+    """curr 相对 prev 新增的牌（多重集合差），按 curr 中的顺序返回"""
+    remaining = np.maximum(counts(curr) - counts(prev), 0)
+    if not remaining.any():
+        return []
+    new_tiles = []
+    for tile in curr:
+        index = TILE_INDEX.get(tile)
+        if index is not None and remaining[index] > 0:
+            remaining[index] -= 1
+            new_tiles.append(tile)
+    return new_tiles
+
+def take(counts37: np.ndarray, kind_index: int, n: int) -> List[str]:
+    """从计数向量中取出 n 张某牌种的实际牌（先取普通牌，再取红五），并从向量中扣除"""
+    taken = []
+    for index in [kind_index] + [red for red in RED_FIVES if FOLD[red] == kind_index]:
+        k = min(n - len(taken), int(counts37[index]))
+        counts37[index] -= k
+        taken.extend([TILE_NAMES[index]] * k)
+    return taken
+
+def over_limit(counts37: np.ndarray) -> List[str]:
+    """超过实际张数的牌（每种最多 4 张，每种红五最多 1 张）"""
+    counts34 = fold(counts37)
+    over = [TILE_NAMES[i] for i in np.flatnonzero(counts34 > 4).tolist()]
+    over += [TILE_NAMES[i] for i in RED_FIVES if counts37[i] > 1]
+    return over
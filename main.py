@@ -1,19 +1,28 @@
 import os
 import sys
-import json
 import time
-import psutil
 import threading
 import shutil
-import pygetwindow as gw
 from concurrent.futures import ThreadPoolExecutor
-from GameScreenShot import HighQualityCapturer
+from Metrics import StartupTimer
 
 sys.stdout.reconfigure(encoding="utf-8")
 
-# 🌟 预加载配置
-with open("Data/json/profile.json", "r", encoding="utf-8") as f:
-    profile = json.load(f)
+# 🌟 启动耗时统计（导入分解）
+startup_timer = StartupTimer()
+
+# 🌟 预加载配置（各模块共享同一份）
+with startup_timer.measure("配置"):
+    from Config import profile
+
+with startup_timer.measure("psutil/pygetwindow"):
+    import psutil
+    import pygetwindow as gw
+
+# 截图与图像处理模块（torch / paddleocr 延迟到首次使用时导入）
+with startup_timer.measure("GameScreenShot"):
+    from GameScreenShot import HighQualityCapturer
+    from StateChannel import board_channel
 
 def check_path(paths):
     """检查路径是否存在，不存在则创建"""
@@ -107,7 +116,6 @@ class OptimizedGameMonitor:
                     print("⏸️ 游戏已关闭，停止截图")
                     self.capturer.stop()
                 self.last_state = game_active
-                profile["is_game_running"] = game_active
             else:
                 if not game_active and not self.printFlag:
                     print("❌ 游戏处于非活跃状态")
@@ -124,7 +132,6 @@ class OptimizedGameMonitor:
 
 def valueInit():
     """优化初始化流程"""
-    global profile
     print("🚀 正在初始化...")
     # 🌟 并行路径检查
     with ThreadPoolExecutor() as executor:
@@ -134,13 +141,8 @@ def valueInit():
     # 🌟 快速清空目录
     clear_folders()
 
-    # 🌟 内存中更新配置避免写文件
-    profile.update(
-        {
-            "IsGmeRunning": False,
-            "BestMatchState": {k: 0 for k in ["MainMenu", "INGame", "ResultScreen", "Matching", "Pause"]},
-        }
-    )
+    # 🌟 配置运行期只读，文件修改后热重载（游戏运行状态由 OptimizedGameMonitor.last_state 维护）
+    profile.watch()
     print("🚀 初始化完毕")
 
 if __name__ == "__main__":
@@ -148,7 +150,23 @@ if __name__ == "__main__":
     valueInit()
     
     # 🌟 初始化高性能截图器
-    capturer = HighQualityCapturer()
+    with startup_timer.measure("截图器初始化"):
+        capturer = HighQualityCapturer()
+    startup_timer.report()
+
+    # 🌟 等待游戏进程期间后台预热模型
+    capturer.warm_up(startup_timer)
+
+    # 🌟 牌局状态 → 动作检测：进程内订阅，或通过命名管道转发给独立的 ActionGenerator 进程
+    channel_cfg = profile["BoardChannel"]
+    if channel_cfg["Mode"] == "inprocess":
+        from ActionGenerator import MahjongActionDetector, ActionLog, attach_detector
+        open(profile["PATH"]["ActionPath"], "w", encoding="utf-8").close()
+        action_log = ActionLog(profile["PATH"]["ActionPath"], channel_cfg["ActionFlushCount"], channel_cfg["ActionFlushInterval"])
+        attach_detector(board_channel, MahjongActionDetector(), action_log)
+    elif channel_cfg["Mode"] == "pipe":
+        from StateChannel import StateServer
+        state_server = StateServer(board_channel, channel_cfg["PipeName"], channel_cfg["AuthKey"].encode())
 
     # 🌟 启动优化后的监控器
     monitor = OptimizedGameMonitor(capturer)
@@ -168,6 +186,8 @@ if __name__ == "__main__":
         # 停止顺序优化
         monitor.stop()
         capturer.stop()
+        if channel_cfg["Mode"] == "inprocess":
+            action_log.close()
         # 强制退出机制
         for t in threading.enumerate():
             if t is not threading.main_thread():
@@ -0,0 +1,41 @@
+from ActionGenerator import MahjongActionDetector
+
+# 用法（在项目根目录执行）: python -m pytest
+
+def pond_state(tiles:list, melds:list=None)-> dict:
+    return {"tiles": {"Second_Discard": tiles, "Third_Mingpai": melds or []}}
+
+def discards(detector:MahjongActionDetector, prev:list, curr:list)-> list:
+    """seat 1 的牌河从 prev 变为 curr 时输出的弃牌"""
+    detector.current_turn = 1
+    return [a["tile"] for a in detector.detect_discards(pond_state(prev), pond_state(curr))]
+
+def test_pond_flicker_is_deduplicated():
+    """牌河识别闪烁（牌短暂消失后重新出现）不会重复输出弃牌"""
+    detector = MahjongActionDetector()
+    assert discards(detector, [], ["5m"]) == ["5m"]
+    assert discards(detector, ["5m"], []) == []
+    assert discards(detector, [], ["5m"]) == []
+    assert len(detector.last_actions) == 1
+
+def test_discard_after_called_tile_is_not_deduplicated():
+    """被鸣走的弃牌离开牌河后，同一家再打出同种牌仍应输出，且之后的闪烁仍能去重"""
+    detector = MahjongActionDetector()
+    assert discards(detector, [], ["5m"]) == ["5m"]
+
+    # seat 2 碰 5m，seat 1 牌河中的 5m 被拿走
+    melds = detector.detect_melds(pond_state(["5m"]), pond_state([], ["5m", "5m", "5m"]))
+    assert [m["operation"]["type"] for m in melds] == [3]
+
+    assert discards(detector, [], ["5m"]) == ["5m"]
+    assert discards(detector, ["5m"], []) == []
+    assert discards(detector, [], ["5m"]) == []
+    assert [a["tile"] for a in detector.last_actions if a.get("state") == "Discard"] == ["5m", "5m"]
+
+def test_actions_carry_unseen_snapshot():
+    """输出的动作附带该动作之后的未见牌快照，供下游读取剩余张数与摸牌概率"""
+    detector = MahjongActionDetector()
+    detector.current_turn = 1
+    actions = detector.account(detector.detect_discards(pond_state([]), pond_state(["5m", "5m"])))
+    assert [a["unseen"]["remaining"]["5m"] for a in actions] == [3, 2]
+    assert actions[-1]["unseen"]["total"] == detector.unseen.total
@@ -0,0 +1,38 @@
+import numpy as np
+import TileCodec
+from MeldDecomposer import CHI, PON, Meld, choose_partition, decompose_tiles, meld_tiles, new_melds
+
+# 用法（在项目根目录执行）: python -m pytest
+
+def kind(tile:str)-> int:
+    return TileCodec.kind(tile)
+
+def test_pon_plus_overlapping_chi():
+    """3333 45：唯一划分为 333 刻子 + 345 顺子"""
+    partitions = decompose_tiles(["3m", "3m", "3m", "3m", "4m", "5m"])
+    assert partitions == ((Meld(CHI, kind("3m")), Meld(PON, kind("3m"))),)
+
+    # 已有 333 刻子时，新增面子为顺子
+    chosen = choose_partition(partitions, (Meld(PON, kind("3m")),), kind("4m"))
+    assert new_melds(chosen, (Meld(PON, kind("3m")),)) == [Meld(CHI, kind("3m"))]
+
+def test_pon_chi_ambiguity_follows_previous_partition():
+    """111222333 可拆为三刻子或三顺子，由上一帧的划分决定"""
+    tiles = ["1m"] * 3 + ["2m"] * 3 + ["3m"] * 3
+    partitions = decompose_tiles(tiles)
+    pons = tuple(Meld(PON, kind(t)) for t in ("1m", "2m", "3m"))
+    chis = (Meld(CHI, kind("1m")),) * 3
+    assert set(partitions) == {pons, chis}
+
+    assert choose_partition(partitions, pons[:2], kind("3m")) == pons
+    assert choose_partition(partitions, chis[:2], kind("3m")) == chis
+
+def test_meld_tiles_prefers_new_tiles_and_deducts_counts():
+    """优先从新增牌中取牌（红五归属新面子），并从调用方的计数向量中扣除"""
+    counts37 = TileCodec.counts(["5p", "5p", "5p", "0p", "6p", "7p"])
+    preferred = TileCodec.counts(["0p", "6p", "7p"])
+    tiles = meld_tiles([Meld(CHI, kind("5p"))], counts37, preferred)
+
+    assert tiles == [["0p", "6p", "7p"]]
+    assert np.array_equal(counts37, TileCodec.counts(["5p", "5p", "5p"]))
+    assert np.array_equal(preferred, TileCodec.counts(["0p", "6p", "7p"]))
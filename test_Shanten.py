@@ -0,0 +1,57 @@
+import pytest
+import Shanten
+
+# 用法（在项目根目录执行）: python -m pytest
+# 查表在临时目录中生成一次（约 20 秒），不读写 Data/shanten/
+
+TERMINAL_TILES = ["1m", "9m", "1p", "9p", "1s", "9s", "1z", "2z", "3z", "4z", "5z", "6z", "7z"]
+
+def hand(text:str)-> list:
+    """'123m55p' -> ['1m', '2m', '3m', '5p', '5p']"""
+    tiles, digits = [], []
+    for c in text:
+        if c.isdigit():
+            digits.append(c)
+        else:
+            tiles += [d + c for d in digits]
+            digits = []
+    return tiles
+
+@pytest.fixture(scope="session")
+def evaluator(tmp_path_factory)-> Shanten.HandEvaluator:
+    path = Shanten.build_suit_table(str(tmp_path_factory.mktemp("shanten") / "suit_table.npz"))
+    return Shanten.HandEvaluator(Shanten.SuitTable(path))
+
+@pytest.fixture
+def evaluate(evaluator):
+    return lambda text: evaluator.evaluate(hand(text))
+
+def test_complete_hand(evaluate):
+    assert evaluate("123456789m123p55p")["shanten"] == -1
+    assert evaluate("11m22m33p44p55s66s77z")["shanten"] == -1
+
+def test_regular_tenpai(evaluate):
+    result = evaluate("123456789m123p5p")
+    assert result["shanten"] == 0
+    assert result["ukeire"] == {"5p": 3}
+
+def test_chiitoitsu_tenpai(evaluate):
+    result = evaluate("11m22m33p44p55s66s7z")
+    assert result["shanten"] == 0
+    assert result["ukeire"] == {"7z": 3}
+
+def test_kokushi_thirteen_sided_wait(evaluate):
+    result = evaluate("19m19p19s1234567z")
+    assert result["shanten"] == 0
+    assert result["ukeire"] == {tile: 3 for tile in TERMINAL_TILES}
+    assert result["ukeireCount"] == 39
+
+def test_discards_keep_shanten(evaluate):
+    result = evaluate("123456789m123p5p7z")
+    assert result["shanten"] == 0
+    assert set(result["discards"]) == {"5p", "7z"}
+
+def test_called_hand_counts_regular_form_only(evaluate):
+    """10 张（一副露）：国士无双形不计入（否则为 3 向听）"""
+    result = evaluate("19m19p19s1234z")
+    assert result["shanten"] == 6
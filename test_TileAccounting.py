@@ -0,0 +1,47 @@
+from TileAccounting import UnseenTiles
+
+# 用法（在项目根目录执行）: python -m pytest
+
+def discard(seat:int, tile:str)-> dict:
+    return {"state": "Discard", "seat": seat, "tile": tile}
+
+def meld(seat:int, op_type:int, tile:str, combination:list)-> dict:
+    return {"state": "Other_Chipongang", "seat": seat, "tile": tile,
+            "operation": {"type": op_type, "combination": combination}}
+
+def test_chi_then_pon_of_same_kind():
+    """吃 345m 后再碰 4m：碰的三张中只有被鸣的一张此前可见"""
+    unseen = UnseenTiles()
+    unseen.update(discard(3, "4m"))
+    unseen.update(meld(1, 2, "4m", ["3m", "4m", "5m"]))
+    unseen.update(discard(3, "4m"))
+    unseen.update(meld(1, 3, "4m", ["4m", "4m", "4m"]))
+    assert unseen.remaining("4m") == 0
+    assert unseen.remaining("3m") == 3 and unseen.remaining("5m") == 3
+
+def test_two_overlapping_chis():
+    """吃 123m 后再吃 234m：第二组的 2m、3m 也是新亮出的牌"""
+    unseen = UnseenTiles()
+    unseen.update(discard(1, "1m"))
+    unseen.update(meld(2, 2, "1m", ["1m", "2m", "3m"]))
+    unseen.update(discard(1, "4m"))
+    unseen.update(meld(2, 2, "4m", ["2m", "3m", "4m"]))
+    assert [unseen.remaining(t) for t in ("1m", "2m", "3m", "4m")] == [3, 2, 2, 3]
+
+def test_pon_then_added_kan():
+    """碰 7p 后加杠：只新增手中的一张"""
+    unseen = UnseenTiles()
+    unseen.update(discard(3, "7p"))
+    unseen.update(meld(2, 3, "7p", ["7p", "7p", "7p"]))
+    assert unseen.remaining("7p") == 1
+    unseen.update(meld(2, 5, "7p", ["7p", "7p", "7p", "7p"]))
+    assert unseen.remaining("7p") == 0
+    assert unseen.conflicts == 0
+
+def test_open_kan():
+    """明杠：被鸣的一张之外三张新亮出"""
+    unseen = UnseenTiles()
+    unseen.update(discard(1, "9s"))
+    unseen.update(meld(3, 5, "9s", ["9s", "9s", "9s", "9s"]))
+    assert unseen.remaining("9s") == 0
+    assert unseen.conflicts == 0